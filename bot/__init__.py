@@ -4,6 +4,6 @@ Enhanced Telegram userbot framework
 """
 
 from .client import NexusClient
-from .logger import setup_logging
+from .logger import setup_logging, stop_logging
 
-__all__ = ['NexusClient', 'setup_logging']
\ No newline at end of file
+__all__ = ['NexusClient', 'setup_logging', 'stop_logging']
\ No newline at end of file
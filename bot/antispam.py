@@ -0,0 +1,121 @@
+"""
+Anti-spam for Nexus v2.0
+Per-user and per-chat command rate limits with a temporary ignore list
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import logging
+import time
+from typing import Optional, Dict, Any
+
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Seconds between sweeps of idle buckets and expired ignores
+SWEEP_INTERVAL = 60.0
+
+
+class AntiSpam:
+    """Token-bucket flood control checked by the router before dispatch
+
+    A user who runs out of command tokens is ignored for `ignore_for`
+    seconds; a chat that runs out only has the flooding commands dropped.
+    Buckets that have refilled completely carry no information and are
+    swept periodically, so memory tracks active senders only. Checking an
+    ignored user is one dict lookup and a float comparison.
+    """
+
+    def __init__(
+        self,
+        user_rate: float = 0.5,
+        user_burst: float = 5,
+        chat_rate: float = 2,
+        chat_burst: float = 20,
+        ignore_for: float = 300
+    ):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.ignore_for = ignore_for
+        self._users: Dict[int, TokenBucket] = {}
+        self._chats: Dict[int, TokenBucket] = {}
+        self._ignored: Dict[int, float] = {}
+        self._next_sweep = time.monotonic() + SWEEP_INTERVAL
+
+        # Metrics
+        self.dropped = 0
+        self.ignored_updates = 0
+        self.offenders = 0
+
+    def is_ignored(self, user_id: Optional[int]) -> bool:
+        """True while a user is on the ignore list (hot path - keep it cheap)"""
+        until = self._ignored.get(user_id)
+        if until is None:
+            return False
+        if until > time.monotonic():
+            self.ignored_updates += 1
+            return True
+        del self._ignored[user_id]
+        return False
+
+    def ignore(self, user_id: int, seconds: Optional[float] = None):
+        """Put a user on the ignore list"""
+        self._ignored[user_id] = time.monotonic() + (seconds if seconds is not None else self.ignore_for)
+
+    def unignore(self, user_id: int):
+        self._ignored.pop(user_id, None)
+
+    def check(self, user_id: Optional[int], chat_id: Optional[int]) -> bool:
+        """Charge one command; False if it must be dropped
+
+        A command is dropped when the user's bucket is empty (the user is
+        then ignored) or when the chat as a whole is flooding.
+        """
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+        if user_id is not None:
+            bucket = self._users.get(user_id)
+            if bucket is None:
+                bucket = self._users[user_id] = TokenBucket(self.user_rate, self.user_burst)
+            if not bucket.try_acquire():
+                self.ignore(user_id)
+                self.offenders += 1
+                self.dropped += 1
+                logger.warning(f"🚫 Ignoring {user_id} for {self.ignore_for:.0f}s (command flood)")
+                return False
+
+        if chat_id is not None:
+            bucket = self._chats.get(chat_id)
+            if bucket is None:
+                bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+            if not bucket.try_acquire():
+                self.dropped += 1
+                return False
+
+        return True
+
+    def _sweep(self, now: float):
+        """Forget idle buckets and expired ignores"""
+        self._next_sweep = now + SWEEP_INTERVAL
+        for table in (self._users, self._chats):
+            for key in [key for key, bucket in table.items() if bucket.is_full]:
+                del table[key]
+        for user_id in [user_id for user_id, until in self._ignored.items() if until <= now]:
+            del self._ignored[user_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of anti-spam metrics"""
+        return {
+            "tracked_users": len(self._users),
+            "tracked_chats": len(self._chats),
+            "ignored_users": len(self._ignored),
+            "dropped": self.dropped,
+            "ignored_updates": self.ignored_updates,
+            "offenders": self.offenders,
+        }
@@ -0,0 +1,336 @@
+"""
+Plugin budgets for Nexus v2.0
+Per-plugin accounting (tasks, CPU, API calls, bytes) with throttling and auto-disable
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from collections.abc import Coroutine
+from typing import Optional, Dict, Any, List, Set
+
+from pyrogram import raw
+
+from .instrument import measure
+from .plugins import current_plugin
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# At most one strike per plugin in this many seconds, and strikes are
+# forgotten after STRIKE_RESET seconds without a new one
+STRIKE_INTERVAL = 10.0
+STRIKE_RESET = 300.0
+
+# Upload parts are paced by the bytes budget only
+FILE_PARTS = (raw.functions.upload.SaveFilePart, raw.functions.upload.SaveBigFilePart)
+
+
+def payload_size(query) -> int:
+    """Bytes a raw API request sends (file parts are counted without serializing)"""
+    data = getattr(query, "bytes", None)
+    if isinstance(data, bytes):
+        return len(data)
+    try:
+        return len(query.write())
+    except Exception:
+        return 0
+
+
+class PluginUsage:
+    """Counters and budget buckets of one plugin
+
+    `cpu` is accumulated by instrument.measure for the plugin's tasks and
+    handlers; the part not yet charged to the CPU bucket is settled on the
+    next admission check.
+    """
+
+    __slots__ = (
+        "name", "cpu", "cpu_charged", "invocations", "throttled", "tasks", "live",
+        "api_calls", "bytes_sent", "cpu_bucket", "api_bucket", "bytes_bucket",
+        "strikes", "last_strike", "disabled",
+    )
+
+    def __init__(self, name: str, cpu_budget: float, api_budget: float, bytes_budget: float):
+        self.name = name
+        self.cpu = 0.0
+        self.cpu_charged = 0.0
+        self.invocations = 0
+        self.throttled = 0
+        self.tasks = 0
+        self.live: Set[asyncio.Task] = set()
+        self.api_calls = 0
+        self.bytes_sent = 0
+        # Budgets are per minute; a bucket holds one minute's worth
+        self.cpu_bucket = TokenBucket(cpu_budget / 60, cpu_budget) if cpu_budget else None
+        self.api_bucket = TokenBucket(api_budget / 60, api_budget) if api_budget else None
+        self.bytes_bucket = TokenBucket(bytes_budget / 60, bytes_budget) if bytes_budget else None
+        self.strikes = 0
+        self.last_strike = 0.0
+        self.disabled: Optional[str] = None
+
+
+class _MeasuredTask(Coroutine):
+    """Coroutine a plugin task runs through, charging each step's CPU time
+
+    Steps are forwarded to the wrapped coroutine directly (no extra frame),
+    and a task cancelled before it started still closes what it wraps.
+    """
+
+    __slots__ = ("coro", "usage")
+
+    def __init__(self, coro, usage: PluginUsage):
+        self.coro = coro
+        self.usage = usage
+
+    def send(self, value):
+        started = time.thread_time()
+        try:
+            return self.coro.send(value)
+        finally:
+            self.usage.cpu += time.thread_time() - started
+
+    def throw(self, *args):
+        started = time.thread_time()
+        try:
+            return self.coro.throw(*args)
+        finally:
+            self.usage.cpu += time.thread_time() - started
+
+    def close(self):
+        self.coro.close()
+
+    def __await__(self):
+        return self.coro.__await__()
+
+    def __getattr__(self, name):
+        # cr_frame, cr_await etc. for task introspection and stack sampling
+        return getattr(self.coro, name)
+
+
+class PluginBudgets:
+    """Attribute work to plugins and keep each within its budget
+
+    Work is attributed through the current_plugin context variable, which
+    the loader sets while a plugin is imported or set up and the router
+    sets around its commands; tasks inherit it. An installed task factory
+    counts the tasks each plugin spawns and measures their CPU time,
+    NexusClient.invoke charges API calls and request bytes, and Pyrogram
+    handlers registered by a plugin are wrapped the same way.
+
+    API calls and bytes over budget are paced (the caller waits for its
+    bucket); file upload parts count against the bytes budget only. A
+    plugin in CPU debt has its commands and handlers skipped until the
+    bucket refills. Skips and paced API calls are strikes (paced bytes are
+    not, so a long upload is slowed but never disabled); after
+    `disable_after` strikes, or with more than `task_limit` live tasks, the
+    plugin is disabled: its tasks are cancelled, its commands and handlers
+    are skipped and its API calls fail until it is enabled again.
+    """
+
+    def __init__(
+        self,
+        cpu_budget: float = 0,
+        api_budget: float = 0,
+        bytes_budget: float = 0,
+        task_limit: int = 0,
+        disable_after: int = 0
+    ):
+        self.cpu_budget = cpu_budget
+        self.api_budget = api_budget
+        self.bytes_budget = bytes_budget
+        self.task_limit = task_limit
+        self.disable_after = disable_after
+        self.usage: Dict[str, PluginUsage] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._previous_factory = None
+
+        # Metrics
+        self.disables = 0
+
+    def get(self, plugin: str) -> PluginUsage:
+        usage = self.usage.get(plugin)
+        if usage is None:
+            usage = self.usage[plugin] = PluginUsage(plugin, self.cpu_budget, self.api_budget, self.bytes_budget)
+        return usage
+
+    def install(self):
+        """Count tasks created by plugins on the running loop"""
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._previous_factory = self._loop.get_task_factory()
+        self._loop.set_task_factory(self._task_factory)
+
+    def uninstall(self):
+        if self._loop is None:
+            return
+        if self._loop.get_task_factory() == self._task_factory:
+            self._loop.set_task_factory(self._previous_factory)
+        self._loop = None
+        self._previous_factory = None
+
+    def _task_factory(self, loop, coro, context=None, **kwargs):
+        # Python 3.13.3+ also passes name= and other create_task arguments through
+        plugin = context.get(current_plugin) if context is not None else current_plugin.get()
+        if plugin is not None and inspect.iscoroutine(coro):
+            usage = self.get(plugin)
+            usage.tasks += 1
+            coro = _MeasuredTask(coro, usage)
+        else:
+            usage = None
+
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, context=context, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, context=context, **kwargs)
+
+        if usage is not None:
+            usage.live.add(task)
+            task.add_done_callback(usage.live.discard)
+            if self.task_limit and len(usage.live) > self.task_limit and not usage.disabled:
+                # Cancelling from inside create_task would hit the new task too
+                loop.call_soon(self.disable, usage.name, f"more than {self.task_limit} live tasks")
+        return task
+
+    def _strike(self, usage: PluginUsage, reason: str):
+        now = time.monotonic()
+        if now - usage.last_strike < STRIKE_INTERVAL:
+            return
+        if now - usage.last_strike > STRIKE_RESET:
+            usage.strikes = 0
+        usage.strikes += 1
+        usage.last_strike = now
+        logger.warning(f"🐌 Plugin {usage.name} throttled: {reason} (strike {usage.strikes})")
+        if self.disable_after and usage.strikes >= self.disable_after:
+            self.disable(usage.name, f"over budget {usage.strikes} times ({reason})")
+
+    def admit(self, plugin: Optional[str]) -> bool:
+        """Whether a plugin may run a command or handler now (hot path)"""
+        if plugin is None:
+            return True
+        usage = self.get(plugin)
+        if usage.disabled:
+            usage.throttled += 1
+            return False
+        bucket = usage.cpu_bucket
+        if bucket is None:
+            return True
+        # Settle CPU measured since the last check
+        spent = usage.cpu - usage.cpu_charged
+        if spent:
+            bucket.charge(spent)
+            usage.cpu_charged = usage.cpu
+        if bucket.delay(0) > 0:
+            usage.throttled += 1
+            self._strike(usage, "CPU budget exhausted")
+            return False
+        return True
+
+    def charge_cpu(self, plugin: str, seconds: float):
+        """Charge a measured command invocation to its plugin"""
+        usage = self.get(plugin)
+        usage.invocations += 1
+        usage.cpu += seconds
+
+    async def run(self, plugin: str, coro):
+        """Await a handler coroutine, charging its CPU time to the plugin"""
+        usage = self.get(plugin)
+        usage.invocations += 1
+        token = current_plugin.set(plugin)
+        try:
+            return await measure(coro, usage)
+        finally:
+            current_plugin.reset(token)
+
+    def wrap(self, plugin: str, callback):
+        """Attribute a Pyrogram handler callback to a plugin"""
+        if not inspect.iscoroutinefunction(callback):
+            # Pyrogram runs sync callbacks in its thread pool; leave them as they are
+            return callback
+
+        async def guarded(client, *args):
+            if not self.admit(plugin):
+                return
+            await self.run(plugin, callback(client, *args))
+
+        guarded.__wrapped__ = callback
+        return guarded
+
+    async def charge_call(self, plugin: str, query):
+        """Count one API call by a plugin, pacing it to the plugin's budgets"""
+        usage = self.get(plugin)
+        if usage.disabled:
+            raise PermissionError(f"Plugin {plugin} is disabled: {usage.disabled}")
+        size = payload_size(query)
+        usage.bytes_sent += size
+        if not isinstance(query, FILE_PARTS):
+            usage.api_calls += 1
+            bucket = usage.api_bucket
+            if bucket is not None:
+                if bucket.delay(1) > 0:
+                    usage.throttled += 1
+                    self._strike(usage, "API call budget exhausted")
+                await bucket.acquire(1)
+        bucket = usage.bytes_bucket
+        if bucket is not None and size:
+            if bucket.delay(size) > 0:
+                usage.throttled += 1
+            await bucket.acquire(size)
+
+    def disable(self, plugin: str, reason: str = "disabled manually"):
+        """Stop a plugin: cancel its tasks and refuse its commands, handlers and API calls"""
+        usage = self.get(plugin)
+        if usage.disabled:
+            return
+        usage.disabled = reason
+        self.disables += 1
+        for task in list(usage.live):
+            task.cancel()
+        logger.error(f"⛔ Plugin {plugin} disabled: {reason}")
+
+    def enable(self, plugin: str) -> bool:
+        """Lift a disable and forget the plugin's strikes and debt"""
+        usage = self.usage.get(plugin)
+        if usage is None or not usage.disabled:
+            return False
+        usage.disabled = None
+        usage.strikes = 0
+        usage.cpu_charged = usage.cpu
+        for bucket in (usage.cpu_bucket, usage.api_bucket, usage.bytes_bucket):
+            if bucket is not None:
+                bucket.tokens = bucket.capacity
+        logger.info(f"✅ Plugin {plugin} enabled")
+        return True
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Per-plugin usage, most expensive (CPU, then API calls) first"""
+        rows = [
+            {
+                "plugin": usage.name,
+                "cpu": usage.cpu,
+                "invocations": usage.invocations,
+                "api_calls": usage.api_calls,
+                "bytes_sent": usage.bytes_sent,
+                "tasks": usage.tasks,
+                "live_tasks": len(usage.live),
+                "throttled": usage.throttled,
+                "strikes": usage.strikes,
+                "disabled": usage.disabled,
+            }
+            for usage in self.usage.values()
+        ]
+        rows.sort(key=lambda row: (row["cpu"], row["api_calls"]), reverse=True)
+        return rows
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of budget metrics"""
+        return {
+            "plugins": len(self.usage),
+            "disabled": sum(1 for usage in self.usage.values() if usage.disabled),
+            "disables": self.disables,
+        }
@@ -0,0 +1,191 @@
+"""
+Built-in commands for Nexus v2.0
+Commands every NexusClient provides without plugins
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import logging
+
+from pyrogram.enums import ChatType
+from pyrogram.types import Message
+
+logger = logging.getLogger(__name__)
+
+# Most commands shown by .stats and plugins shown by .plugins
+STATS_LIMIT = 25
+
+
+async def respond(message: Message, text: str):
+    """Edit our own command message, reply to anyone else's"""
+    if message.outgoing:
+        return await message.edit_text(text)
+    return await message.reply_text(text)
+
+
+def _authorized(client, message: Message) -> bool:
+    """Built-ins are for the owner and sudo users only"""
+    if message.outgoing:
+        return True
+    return bool(message.from_user and client.is_sudo(message.from_user.id))
+
+
+async def stats_command(client, message: Message):
+    """Show p50/p95/p99 latency per command"""
+    if not _authorized(client, message):
+        return
+
+    stats = client.metrics.get_command_stats()
+    if not stats:
+        await respond(message, "📊 No commands have run yet.")
+        return
+
+    ranked = sorted(stats.items(), key=lambda item: item[1]["p95"], reverse=True)[:STATS_LIMIT]
+    width = max(len(name) for name, _ in ranked)
+    lines = [f"{'command':<{width}}  calls    p50    p95    p99  rpc%  cpu%"]
+    for name, s in ranked:
+        lines.append(
+            f"{name:<{width}}  {s['calls']:>5}  {s['p50'] * 1000:>5.0f}  {s['p95'] * 1000:>5.0f}  "
+            f"{s['p99'] * 1000:>5.0f}  {s['rpc_share'] * 100:>4.0f}  {s['cpu_share'] * 100:>4.0f}"
+        )
+
+    queue = client.scheduler.get_stats()
+    text = (
+        "📊 **Command latency** (ms, recent calls)\n\n"
+        "```\n" + "\n".join(lines) + "\n```\n"
+        f"**Queue:** {queue['depth']} waiting, avg wait {queue['wait_avg'] * 1000:.0f}ms, "
+        f"{queue['shed']} shed"
+    )
+    await respond(message, text[:client.config.MAX_MESSAGE_LENGTH])
+
+
+async def plugins_command(client, message: Message):
+    """Rank plugins by cost, or `plugins enable|disable <name>`"""
+    if not _authorized(client, message):
+        return
+
+    budgets = client.budgets
+    args = message.command[1:]
+    if len(args) == 2 and args[0].lower() in ("enable", "disable"):
+        action, name = args[0].lower(), args[1]
+        if action == "disable":
+            budgets.disable(name)
+            await respond(message, f"⛔ Disabled plugin `{name}`.")
+        elif budgets.enable(name):
+            await respond(message, f"✅ Enabled plugin `{name}`.")
+        else:
+            await respond(message, f"ℹ️ Plugin `{name}` is not disabled.")
+        return
+
+    rows = budgets.report()[:STATS_LIMIT]
+    if not rows:
+        await respond(message, "🔌 No plugin activity recorded yet.")
+        return
+
+    width = max(len(row["plugin"]) for row in rows)
+    lines = [f"{'plugin':<{width}}   cpu s  calls   api     KiB  tasks  state"]
+    for row in rows:
+        state = "disabled" if row["disabled"] else (f"{row['strikes']} strikes" if row["strikes"] else "ok")
+        lines.append(
+            f"{row['plugin']:<{width}}  {row['cpu']:>6.2f}  {row['invocations']:>5}  {row['api_calls']:>4}  "
+            f"{row['bytes_sent'] / 1024:>6.0f}  {row['live_tasks']:>2}/{row['tasks']:<3}  {state}"
+        )
+    disabled = [f"`{row['plugin']}`: {row['disabled']}" for row in rows if row["disabled"]]
+
+    text = "🔌 **Plugin cost** (since start, most expensive first)\n\n```\n" + "\n".join(lines) + "\n```"
+    if disabled:
+        text += "\n**Disabled:**\n" + "\n".join(disabled)
+    await respond(message, text[:client.config.MAX_MESSAGE_LENGTH])
+
+
+async def _pm_target(client, message: Message):
+    """User a PM permit command refers to: argument, replied-to user or DM partner"""
+    if len(message.command) > 1:
+        user = await client.get_users(message.command[1])
+        return user.id, user.first_name
+    if message.reply_to_message and message.reply_to_message.from_user:
+        user = message.reply_to_message.from_user
+        return user.id, user.first_name
+    if message.chat and message.chat.type == ChatType.PRIVATE:
+        return message.chat.id, message.chat.first_name
+    return None, None
+
+
+async def approve_command(client, message: Message):
+    """Allow a user to private message this account"""
+    if not _authorized(client, message):
+        return
+    user_id, name = await _pm_target(client, message)
+    if user_id is None:
+        await respond(message, "❌ Reply to a user, pass a username/id or use this in their DM.")
+        return
+    await client.pm_permit.approve(user_id)
+    await respond(message, f"✅ Approved {name} (`{user_id}`) to PM you.")
+
+
+async def disapprove_command(client, message: Message):
+    """Revoke a user's PM approval"""
+    if not _authorized(client, message):
+        return
+    user_id, name = await _pm_target(client, message)
+    if user_id is None:
+        await respond(message, "❌ Reply to a user, pass a username/id or use this in their DM.")
+        return
+    await client.pm_permit.disapprove(user_id)
+    await respond(message, f"🚫 Disapproved {name} (`{user_id}`).")
+
+
+def _owner_only(client, message: Message) -> bool:
+    """Permission changes are for the account owner only"""
+    if message.outgoing:
+        return True
+    return bool(message.from_user and client.permissions.is_owner(message.from_user.id))
+
+
+async def _grant_args(client, message: Message):
+    """(user_id, name, scope) for .grant/.revoke: reply or user argument, then optional scope"""
+    args = message.command[1:]
+    if message.reply_to_message and message.reply_to_message.from_user:
+        user = message.reply_to_message.from_user
+    elif args:
+        user = await client.get_users(args.pop(0))
+    else:
+        return None, None, None
+    return user.id, user.first_name, (args[0].lower() if args else None)
+
+
+async def grant_command(client, message: Message):
+    """Make a user sudo, or allow them one plugin or command"""
+    if not _owner_only(client, message):
+        return
+    user_id, name, scope = await _grant_args(client, message)
+    if user_id is None:
+        await respond(message, "❌ Usage: `grant <user> [plugin|command]` or reply to a user.")
+        return
+    await client.permissions.grant(user_id, scope)
+    await respond(message, f"✅ Granted {name} (`{user_id}`) {f'`{scope}`' if scope else 'sudo'}.")
+
+
+async def revoke_command(client, message: Message):
+    """Undo a sudo or per-plugin grant"""
+    if not _owner_only(client, message):
+        return
+    user_id, name, scope = await _grant_args(client, message)
+    if user_id is None:
+        await respond(message, "❌ Usage: `revoke <user> [plugin|command]` or reply to a user.")
+        return
+    await client.permissions.revoke(user_id, scope)
+    await respond(message, f"🚫 Revoked {f'`{scope}`' if scope else 'sudo'} from {name} (`{user_id}`).")
+
+
+def register_builtins(client):
+    """Register the built-in commands on a client"""
+    client.add_command("stats", stats_command, "Per-command latency percentiles")
+    client.add_command("plugins", plugins_command, "Per-plugin CPU, API and task usage")
+    if client.is_userbot:
+        client.add_command("grant", grant_command, "Make a user sudo or grant a plugin/command")
+        client.add_command("revoke", revoke_command, "Revoke a sudo or plugin/command grant")
+    if client.pm_permit is not None:
+        client.add_command("approve", approve_command, "Allow a user to PM you", aliases=["a"])
+        client.add_command("disapprove", disapprove_command, "Revoke a user's PM approval", aliases=["da"])
@@ -0,0 +1,235 @@
+"""
+Entity cache for Nexus v2.0
+Two-tier users/chats/peers cache with request coalescing
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import closing
+from pathlib import Path
+from typing import Optional, Dict, Any, Awaitable, Callable, Hashable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (id, access_hash, type, username, phone_number) - Pyrogram's peers row
+PeerRow = Tuple[int, int, str, Optional[str], Optional[str]]
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries also expire after a TTL"""
+
+    def __init__(self, maxsize: int = 5000, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default=None):
+        item = self._data.pop(key, None)
+        return item[1] if item is not None else default
+
+    def clear(self):
+        self._data.clear()
+
+
+class SQLitePeerStore:
+    """Persistent peer tier in a SQLite file under sessions/"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Callers close it: a connection's own context manager only commits
+        conn = sqlite3.connect(str(self.path), timeout=10)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS peers ("
+            " account TEXT NOT NULL, id INTEGER NOT NULL, access_hash INTEGER,"
+            " type TEXT, username TEXT, phone_number TEXT, updated REAL,"
+            " PRIMARY KEY (account, id))"
+        )
+        return conn
+
+    def _load(self, account: str) -> List[PeerRow]:
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(
+                "SELECT id, access_hash, type, username, phone_number FROM peers WHERE account = ?",
+                (account,)
+            ).fetchall()
+
+    def _save(self, account: str, peers: List[PeerRow]):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "REPLACE INTO peers (account, id, access_hash, type, username, phone_number, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(account, *peer, now) for peer in peers]
+            )
+
+    async def load(self, account: str) -> List[PeerRow]:
+        return await asyncio.to_thread(self._load, account)
+
+    async def save(self, account: str, peers: List[PeerRow]):
+        if peers:
+            await asyncio.to_thread(self._save, account, peers)
+
+    async def close(self):
+        pass
+
+
+class RedisPeerStore:
+    """Persistent peer tier in Redis (one hash per account)"""
+
+    def __init__(self, url: str):
+        # Optional dependency - only needed when REDIS_URL is used
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+
+    async def load(self, account: str) -> List[PeerRow]:
+        rows = await self._redis.hvals(f"nexus:peers:{account}")
+        return [tuple(json.loads(row)) for row in rows]
+
+    async def save(self, account: str, peers: List[PeerRow]):
+        if peers:
+            await self._redis.hset(
+                f"nexus:peers:{account}",
+                mapping={str(peer[0]): json.dumps(list(peer)) for peer in peers}
+            )
+
+    async def close(self):
+        await self._redis.close()
+
+
+def create_peer_store(config):
+    """Pick the persistent tier from configuration (None when disabled)"""
+    if not config.ENTITY_CACHE_PERSIST:
+        return None
+    if config.REDIS_URL:
+        try:
+            return RedisPeerStore(config.REDIS_URL)
+        except ImportError:
+            logger.warning("REDIS_URL is set but the redis package is not installed - using SQLite")
+    return SQLitePeerStore(config.BASE_DIR / "sessions" / "entities.db")
+
+
+class EntityCache:
+    """In-memory LRU/TTL tier plus optional persistent peer tier
+
+    Concurrent lookups of the same key share one in-flight request, so a
+    burst of handlers asking for the same user costs a single RPC.
+    """
+
+    def __init__(self, maxsize: int = 5000, ttl: float = 300.0, store=None):
+        self.memory = TTLCache(maxsize, ttl)
+        self.store = store
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable):
+        """Cached value or None (no fetching)"""
+        return self.memory.get(key)
+
+    def set(self, key: Hashable, value: Any):
+        self.memory.set(key, value)
+
+    def invalidate(self, key: Hashable):
+        self.memory.pop(key)
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]):
+        """Return the cached value, or fetch it once for all concurrent callers"""
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The caller doing the fetch was cancelled, not us - fetch again
+                return await self.get_or_fetch(key, fetch)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            # Waiters retry instead of inheriting our cancellation
+            future.cancel()
+            raise
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Nobody else may be waiting - mark the exception as retrieved
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        self.memory.set(key, value)
+        future.set_result(value)
+        return value
+
+    async def load_peers(self, account: str) -> List[PeerRow]:
+        """Read persisted peers for an account"""
+        if self.store is None:
+            return []
+        try:
+            return await self.store.load(account)
+        except Exception as e:
+            logger.warning(f"Could not load cached peers for {account}: {e}")
+            return []
+
+    async def save_peers(self, account: str, peers: List[PeerRow]):
+        """Persist peers for an account"""
+        if self.store is None or not peers:
+            return
+        try:
+            await self.store.save(account, peers)
+        except Exception as e:
+            logger.warning(f"Could not persist peers for {account}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of cache metrics"""
+        return {
+            "size": len(self.memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
@@ -9,15 +9,42 @@ import asyncio
 import logging
 import os
 import importlib
+import inspect
 import sys
+import time
+from collections import OrderedDict
+from functools import partial
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
 from pyrogram.client import Client
-from pyrogram import filters
+from pyrogram import filters, ContinuePropagation, StopPropagation
 from pyrogram.errors import FloodWait, AuthKeyUnregistered
+from pyrogram.handlers import DisconnectHandler, EditedMessageHandler, MessageHandler
 from pyrogram.types import Message
 
+from .antispam import AntiSpam
+from .budgets import PluginBudgets
+from .builtins import register_builtins
+from .cache import EntityCache, create_peer_store
+from .database import create_database
+from .downloads import DownloadManager, get_media
+from .filecache import FileCache
+from .history import HistoryEngine
+from .instrument import current_invocation
+from .logsink import LogSink
+from .metrics import ClientMetrics
+from .outbox import OutboundQueue
+from .permissions import Permissions
+from .pmpermit import PMPermit
+from .plugins import (
+    current_plugin, import_fresh, load_manifests, read_plugin_meta, resolve_dependencies, plugin_waves
+)
+from .router import CommandRouter
+from .scheduler import PRIORITY_LOW, UpdateScheduler
+from .search import MessageIndex
+from .uploads import UploadManager
+
 logger = logging.getLogger(__name__)
 
 class NexusClient(Client):
@@ -28,13 +55,23 @@ class NexusClient(Client):
         name: str,
         config,
         is_assistant: bool = False,
+        entities: Optional[EntityCache] = None,
+        db=None,
+        log_sink: Optional[LogSink] = None,
+        cpu_pool=None,
+        downloads: Optional[DownloadManager] = None,
+        uploads: Optional[UploadManager] = None,
+        message_index: Optional[MessageIndex] = None,
+        budgets: Optional[PluginBudgets] = None,
         **kwargs
     ):
+        """Create a client; entities/db/log_sink/cpu_pool/downloads/uploads/message_index/budgets
+        may be shared between accounts
+        (shared components are started and stopped by their owner, not here)"""
         # Initialize client configuration
         self.config = config
         self.is_assistant = is_assistant
         self.is_userbot = not is_assistant
-        self.plugins = {}
         self.commands = {}
         self.loaded_plugins = set()
         
@@ -50,6 +87,8 @@ class NexusClient(Client):
             "api_hash": config.API_HASH,
             "workdir": str(workdir),
             "plugins": None,  # We'll handle plugins manually
+            # Pyrogram serializes file transfers by default; allow parallel parts
+            "max_concurrent_transmissions": config.DOWNLOAD_CONCURRENCY,
             **kwargs
         }
         
@@ -59,18 +98,115 @@ class NexusClient(Client):
             client_args["bot_token"] = config.BOT_TOKEN
         elif not is_assistant:
             # Userbot MUST use session string - no phone number fallback
-            if not config.SESSION_STRING:
+            session_string = kwargs.get("session_string") or config.SESSION_STRING
+            if not session_string:
                 raise ValueError("SESSION_STRING is required for userbot authentication! Generate one using generate_session.py")
-            client_args["session_string"] = config.SESSION_STRING
+            client_args["session_string"] = session_string
         else:
             raise ValueError("Invalid client configuration - missing authentication method")
         
         # Initialize Pyrogram client
         super().__init__(**client_args)
         
+        # Pyrogram's __init__ assigns self.plugins, so ours must come after it
+        self.plugins = {}
+        self.lazy_plugins = {}
+        self.plugin_timings = {}
+        self._plugin_loads = {}
+        self.plugin_manifests: Dict[str, Dict[str, Any]] = {}
+        self._plugin_dependencies: Dict[str, set] = {}
+        # Pyrogram handlers registered by each plugin, and plugins being set up
+        # next to their running version during a reload
+        self._plugin_handlers: Dict[str, List[Tuple[Any, int]]] = {}
+        self._staged_plugins: Dict[str, Dict[str, Any]] = {}
+        self._reload_lock = asyncio.Lock()
+        
         # Set client attributes
         self.start_time = None
         self.command_prefix = config.COMMAND_PREFIX if not is_assistant else config.ASSISTANT_PREFIX
+        self.metrics = ClientMetrics()
+        self.entities = entities or EntityCache(
+            maxsize=config.ENTITY_CACHE_SIZE,
+            ttl=config.ENTITY_CACHE_TTL,
+            store=create_peer_store(config)
+        )
+        self._peers_synced_at = 0
+        self._peer_sync_task = None
+        self._owns_db = db is None
+        self.db = db or create_database(config)
+        self.permissions = Permissions(self, config.SUDO_USERS)
+        self.antispam = AntiSpam(
+            user_rate=config.SPAM_USER_RATE,
+            user_burst=config.SPAM_USER_BURST,
+            chat_rate=config.SPAM_CHAT_RATE,
+            chat_burst=config.SPAM_CHAT_BURST,
+            ignore_for=config.SPAM_IGNORE_SECONDS
+        ) if config.ANTI_SPAM else None
+        self.pm_permit = PMPermit(
+            self,
+            limit=config.PM_WARN_LIMIT,
+            decay=config.PM_WARN_DECAY,
+            reply_rate=config.PM_REPLY_RATE,
+            log=config.PM_LOG
+        ) if config.PM_PERMIT and not is_assistant else None
+        self.router = CommandRouter(self)
+        self.scheduler = UpdateScheduler(
+            name,
+            workers=config.UPDATE_WORKERS,
+            max_queue=config.UPDATE_QUEUE_SIZE
+        )
+        self.outbox = OutboundQueue(
+            name,
+            rate=config.OUTBOUND_RATE,
+            burst=config.OUTBOUND_BURST,
+            chat_rate=config.OUTBOUND_CHAT_RATE,
+            chat_burst=config.OUTBOUND_CHAT_BURST,
+            max_retries=config.FLOOD_WAIT_RETRIES
+        )
+        self._owns_log_sink = log_sink is None
+        self.log_sink = log_sink or LogSink(
+            self.send_message,
+            max_length=config.MAX_MESSAGE_LENGTH,
+            interval=config.LOG_FLUSH_INTERVAL,
+            max_entries=config.LOG_BUFFER_SIZE
+        )
+        
+        self.cpu_pool = cpu_pool
+        self._owns_downloads = downloads is None
+        self.downloads = downloads or DownloadManager(
+            FileCache(config.DOWNLOADS_DIR, max_bytes=config.DOWNLOAD_CACHE_MB * 1024 * 1024),
+            concurrency=config.DOWNLOAD_CONCURRENCY,
+            parts=config.DOWNLOAD_PARTS,
+            part_size=config.DOWNLOAD_PART_SIZE
+        )
+        self.uploads = uploads or UploadManager(
+            concurrency=config.UPLOAD_CONCURRENCY,
+            parts=config.UPLOAD_PARTS,
+            rate=config.UPLOAD_RATE_KB * 1024,
+            progress_interval=config.UPLOAD_PROGRESS_INTERVAL
+        )
+        self._owns_message_index = message_index is None and config.MESSAGE_INDEX
+        if self._owns_message_index:
+            message_index = MessageIndex(
+                config.BASE_DIR / "sessions" / "messages.db",
+                batch_size=config.MESSAGE_INDEX_BATCH
+            )
+        self.message_index = message_index
+        self._owns_budgets = budgets is None
+        self.budgets = budgets or PluginBudgets(
+            cpu_budget=config.PLUGIN_CPU_BUDGET,
+            api_budget=config.PLUGIN_API_BUDGET,
+            bytes_budget=config.PLUGIN_UPLOAD_BUDGET_MB * 1024 * 1024,
+            task_limit=config.PLUGIN_TASK_LIMIT,
+            disable_after=config.PLUGIN_DISABLE_STRIKES
+        )
+        self.history = HistoryEngine(
+            self,
+            rate=config.HISTORY_PAGE_RATE,
+            prefetch=config.HISTORY_PREFETCH
+        )
+        
+        register_builtins(self)
         
         logger.info(f"✅ Initialized {'Assistant Bot' if is_assistant else 'Userbot'} client with {'bot token' if is_assistant else 'session string'}")
     
@@ -84,9 +220,30 @@ class NexusClient(Client):
             # Start Pyrogram client
             await super().start()
             
+            # Warm Pyrogram's peer table so known peers resolve without RPCs
+            await self._warm_peers()
+            
+            # Plugins expect client.db to be usable from setup()
+            if self._owns_db:
+                await self.db.start()
+            if self._owns_message_index:
+                await self.message_index.start()
+            await self.permissions.load()
+            if self.pm_permit is not None:
+                await self.pm_permit.load()
+            if self._owns_budgets:
+                self.budgets.install()
+            
+            # Pyrogram clears handler groups on stop, so attach on every start
+            self.scheduler.start()
+            if self._owns_log_sink:
+                self.log_sink.start()
+            self.router.attach()
+            
             # Get bot info
             me = await self.get_me()
             self.me = me
+            self.permissions.set_owner(me.id)
             
             client_type = "Assistant Bot" if self.is_assistant else "Userbot"
             logger.info(f"✅ {client_type} started: @{me.username or 'N/A'} ({me.id})")
@@ -95,7 +252,6 @@ class NexusClient(Client):
             await self.load_plugins()
             
             # Set start time
-            import time
             self.start_time = time.time()
             
             # Send startup message to log group
@@ -113,6 +269,221 @@ class NexusClient(Client):
             logger.error(f"❌ Failed to start client: {e}")
             raise
     
+    async def stop(self, *args, **kwargs):
+        """Stop routing updates, drain queued handlers, then stop Pyrogram"""
+        self.router.detach()
+        await self.scheduler.stop()
+        if self._owns_log_sink:
+            await self.log_sink.stop()
+        await self.outbox.stop()
+        await self._stop_peer_sync()
+        if self._owns_message_index:
+            await self.message_index.stop()
+        if self._owns_db:
+            await self.db.close()
+        if self._owns_downloads:
+            await asyncio.to_thread(self.downloads.cache.save)
+        if self._owns_budgets:
+            self.budgets.uninstall()
+        return await super().stop(*args, **kwargs)
+    
+    async def run_cpu(self, fn, *args, timeout: Optional[float] = None, **kwargs):
+        """Run a CPU-heavy function without blocking the event loop
+        
+        Uses the shared worker process pool when one is attached (fn and its
+        arguments must then be picklable), otherwise a thread.
+        """
+        if self.cpu_pool is None:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        return await self.cpu_pool.run(fn, *args, timeout=timeout, **kwargs)
+    
+    async def download(self, message) -> Path:
+        """Download the media of a message to DOWNLOADS_DIR and return its path
+        
+        Streams to disk in parallel parts, resumes interrupted downloads and
+        never fetches the same file (by file_unique_id) twice.
+        """
+        return await self.downloads.download(self, message)
+    
+    def get_cached_media(self, message) -> Optional[Path]:
+        """Local path of a message's media if it was downloaded before (no network)"""
+        return self.downloads.lookup(get_media(message))
+    
+    async def upload_file(self, path, progress=None):
+        """Upload a file in parallel parts; returns (raw InputFile, sha256 hex)"""
+        return await self.uploads.upload(self, path, progress)
+    
+    async def send_file(self, chat_id, path, caption: str = "", **kwargs):
+        """Send a local file as a document through the upload manager
+        
+        Accepts file_name, parse_mode and progress(current, total); the
+        progress callback is throttled, and identical content sent before by
+        this account is reused instead of uploaded again.
+        """
+        return await self.uploads.send_document(self, chat_id, path, caption, **kwargs)
+    
+    def iter_history(self, chat_id, limit: int = 0, offset_id: int = 0, min_id: int = 0, checkpoint: Optional[str] = None):
+        """Stream chat history newest to oldest with prefetching and optional resume
+        
+        Pass checkpoint="<scan name>" to resume an interrupted scan; pair with
+        self.history.delete()/forward() for batched bulk actions.
+        """
+        return self.history.iter(chat_id, limit=limit, offset_id=offset_id, min_id=min_id, checkpoint=checkpoint)
+    
+    def _entity_key(self, kind: str, ident):
+        """Cache key for a user/chat lookup on this account"""
+        if isinstance(ident, str):
+            ident = ident.lstrip("@").lower()
+        return (self.name, kind, ident)
+    
+    async def get_me(self):
+        """Get the current account (cached)"""
+        return await self.entities.get_or_fetch(self._entity_key("user", "me"), super().get_me)
+    
+    async def get_users(self, user_ids):
+        """Get users, answering from the entity cache where possible"""
+        if isinstance(user_ids, (int, str)):
+            key = self._entity_key("user", user_ids)
+            user = await self.entities.get_or_fetch(key, partial(super().get_users, user_ids))
+            self._cache_user(user)
+            return user
+        
+        # Fetch all misses in one request and return users in the requested order
+        user_ids = list(user_ids)
+        keys = [self._entity_key("user", i) for i in user_ids]
+        missing = [i for i, key in zip(user_ids, keys) if self.entities.get(key) is None]
+        if missing:
+            for user in await super().get_users(missing):
+                self._cache_user(user)
+        self.entities.hits += len(user_ids) - len(missing)
+        self.entities.misses += len(missing)
+        
+        found = (self.entities.get(key) for key in keys)
+        return [user for user in found if user is not None]
+    
+    def _cache_user(self, user):
+        """Store a user under its id and username"""
+        if user is None:
+            return
+        self.entities.set(self._entity_key("user", user.id), user)
+        if user.username:
+            self.entities.set(self._entity_key("user", user.username), user)
+    
+    async def get_chat(self, chat_id):
+        """Get chat info, answering from the entity cache where possible"""
+        # Invite links return a ChatPreview that must not be cached by id
+        if isinstance(chat_id, str) and ("/" in chat_id or chat_id.startswith("+")):
+            return await super().get_chat(chat_id)
+        
+        chat = await self.entities.get_or_fetch(
+            self._entity_key("chat", chat_id),
+            partial(super().get_chat, chat_id)
+        )
+        if getattr(chat, "id", None) is not None:
+            self.entities.set(self._entity_key("chat", chat.id), chat)
+            if getattr(chat, "username", None):
+                self.entities.set(self._entity_key("chat", chat.username), chat)
+        return chat
+    
+    async def _warm_peers(self):
+        """Load persisted peers into Pyrogram's storage and start syncing"""
+        peers = await self.entities.load_peers(self.name)
+        if peers:
+            try:
+                await self.storage.update_peers(peers)
+                logger.info(f"♻️ Warmed {len(peers)} peers from the entity cache")
+            except Exception as e:
+                logger.warning(f"Could not warm peers: {e}")
+        
+        self._peers_synced_at = int(time.time())
+        if self.entities.store is not None and self._peer_sync_task is None:
+            self._peer_sync_task = asyncio.create_task(self._peer_sync_loop())
+    
+    async def _peer_sync_loop(self):
+        """Periodically persist peers Pyrogram learned since the last sync"""
+        while True:
+            await asyncio.sleep(self.config.ENTITY_PERSIST_INTERVAL)
+            await self._persist_peers()
+    
+    async def _persist_peers(self):
+        """Copy new/updated rows from Pyrogram's peers table to the store"""
+        conn = getattr(self.storage, "conn", None)
+        if conn is None:
+            return
+        
+        since, self._peers_synced_at = self._peers_synced_at, int(time.time())
+        try:
+            rows = conn.execute(
+                "SELECT id, access_hash, type, username, phone_number FROM peers"
+                " WHERE last_update_on >= ?",
+                (since,)
+            ).fetchall()
+        except Exception as e:
+            logger.warning(f"Could not read peers for persistence: {e}")
+            return
+        await self.entities.save_peers(self.name, rows)
+    
+    async def _stop_peer_sync(self):
+        """Stop the sync loop and persist one last time"""
+        if self._peer_sync_task is None:
+            return
+        self._peer_sync_task.cancel()
+        await asyncio.gather(self._peer_sync_task, return_exceptions=True)
+        self._peer_sync_task = None
+        await self._persist_peers()
+    
+    async def invoke(self, query, *args, **kwargs):
+        """Invoke a raw function, charging the wait to the running handler
+        
+        Calls made on behalf of a plugin count against its budget and may be
+        paced (or refused once the plugin is disabled).
+        """
+        plugin = current_plugin.get()
+        if plugin is not None:
+            await self.budgets.charge_call(plugin, query)
+        stats = current_invocation.get()
+        if stats is None:
+            return await super().invoke(query, *args, **kwargs)
+        
+        started = time.perf_counter()
+        try:
+            return await super().invoke(query, *args, **kwargs)
+        finally:
+            stats.add_rpc(time.perf_counter() - started)
+    
+    async def send_message(self, chat_id, text: str, *args, **kwargs):
+        """Send a text message through the rate-limited outbox"""
+        message = await self.outbox.submit(
+            chat_id,
+            partial(super().send_message, chat_id, text, *args, **kwargs)
+        )
+        # Our own sends never come back as updates, so index them here
+        if self.message_index is not None and isinstance(message, Message):
+            self.message_index.add(self.name, message)
+        return message
+    
+    async def edit_message_text(self, chat_id, message_id: int, text: str, *args, **kwargs):
+        """Edit a message through the outbox, merging consecutive edits"""
+        message = await self.outbox.submit(
+            chat_id,
+            partial(super().edit_message_text, chat_id, message_id, text, *args, **kwargs),
+            merge_key=("edit", message_id)
+        )
+        if self.message_index is not None and isinstance(message, Message):
+            self.message_index.add(self.name, message)
+        return message
+    
+    async def search_local(self, query: str, **filters) -> List[Dict[str, Any]]:
+        """Search the local message index (chat_id, since, until, limit, raw)
+        
+        Answers from sessions/messages.db without touching the API; returns an
+        empty list when MESSAGE_INDEX is disabled.
+        """
+        if self.message_index is None:
+            return []
+        filters.setdefault("account", self.name)
+        return await self.message_index.search(query, **filters)
+    
     async def load_plugins(self):
         """Load all plugins from the plugins directory"""
         try:
@@ -121,86 +492,481 @@ class NexusClient(Client):
                 logger.warning(f"Plugins directory not found: {plugins_dir}")
                 return
             
-            # Get all Python files in plugins directory
-            plugin_files = list(plugins_dir.glob("*.py"))
-            plugin_files = [f for f in plugin_files if not f.name.startswith("__")]
+            # Manifests come from a cached index, so nothing is imported to read them
+            self.plugin_manifests = await asyncio.to_thread(
+                load_manifests, plugins_dir, self.config.BASE_DIR / "sessions" / "plugin_manifests.json"
+            )
+            dependencies, skipped = resolve_dependencies(self.plugin_manifests)
+            self._plugin_dependencies = dependencies
+            for plugin_name, reason in skipped.items():
+                logger.error(f"❌ Skipping plugin {plugin_name}: {reason}")
+            
+            logger.info(f"🔌 Loading {len(dependencies)} plugins...")
+            
+            # Pyrogram drops every handler on stop, so forget what plugins registered before
+            self._plugin_handlers.clear()
+            # On restart every plugin registers from scratch; otherwise lazy stubs
+            # would overwrite the real commands of plugins loaded before the stop
+            for plugin_name in {entry.get("plugin") for entry in self.commands.values()} - {None}:
+                self._take_commands(plugin_name)
+            self.router.rebuild()
+            self.plugins.clear()
+            self.loaded_plugins.clear()
+            self.lazy_plugins.clear()
             
-            logger.info(f"🔌 Loading {len(plugin_files)} plugins...")
+            # Lazy plugins only get command stubs; they are imported on first use,
+            # unless an eagerly loaded plugin depends on them
+            eager = {
+                plugin_name for plugin_name in dependencies
+                if not (self.plugin_manifests[plugin_name]["lazy"] and self.plugin_manifests[plugin_name]["commands"])
+            }
+            pending = list(eager)
+            while pending:
+                for dependency in dependencies[pending.pop()]:
+                    if dependency not in eager:
+                        eager.add(dependency)
+                        pending.append(dependency)
+            for plugin_name in sorted(dependencies.keys() - eager):
+                self._register_lazy_plugin(plugin_name, self.plugin_manifests[plugin_name]["commands"])
             
-            for plugin_file in plugin_files:
-                await self.load_plugin(plugin_file.stem)
+            # Each wave only needs plugins from earlier waves
+            waves, _ = plugin_waves({name: dependencies[name] for name in eager})
+            for wave in waves:
+                ready = []
+                for plugin_name in wave:
+                    failed = [dep for dep in dependencies[plugin_name] if dep not in self.loaded_plugins]
+                    if failed:
+                        logger.error(f"❌ Skipping plugin {plugin_name}: dependency {', '.join(failed)} failed to load")
+                    else:
+                        ready.append(plugin_name)
+                
+                # Imports hold the import lock anyway, so run them one by one
+                # (yielding in between so the health server stays responsive)
+                modules = {}
+                for plugin_name in ready:
+                    module = self._import_plugin(plugin_name)
+                    if module is not None:
+                        modules[plugin_name] = module
+                    await asyncio.sleep(0)
+                
+                # ...then run the wave's setup() calls concurrently
+                await asyncio.gather(*(
+                    self._setup_plugin(plugin_name, module)
+                    for plugin_name, module in modules.items()
+                ))
             
-            logger.info(f"✅ Loaded {len(self.loaded_plugins)} plugins successfully")
+            logger.info(
+                f"✅ Loaded {len(self.loaded_plugins)} plugins successfully"
+                f" ({len(self.lazy_plugins)} lazy)"
+            )
+            self._log_plugin_timings()
             
         except Exception as e:
             logger.error(f"❌ Failed to load plugins: {e}")
     
     async def load_plugin(self, plugin_name: str):
         """Load a specific plugin"""
+        module = self._import_plugin(plugin_name)
+        if module is not None:
+            await self._setup_plugin(plugin_name, module)
+    
+    def _import_plugin(self, plugin_name: str, fresh: bool = False):
+        """Import a plugin module and record how long it took"""
+        token = current_plugin.set(plugin_name)
         try:
             # Import the plugin module
             module_name = f"plugins.{plugin_name}"
             
-            # Remove from sys.modules if already loaded (for hot reload)
-            if module_name in sys.modules:
-                del sys.modules[module_name]
-            
-            # Import the module
-            module = importlib.import_module(module_name)
+            # Modules are shared: other accounts reuse an already imported
+            # plugin and only run its setup() (fresh=True imports a new copy)
+            started = time.perf_counter()
+            module = import_fresh(plugin_name) if fresh else importlib.import_module(module_name)
+            self.plugin_timings[plugin_name] = {
+                "import": time.perf_counter() - started,
+                "setup": 0.0,
+                "lazy": plugin_name in self.lazy_plugins,
+            }
+            return module
             
+        except Exception as e:
+            logger.error(f"❌ Failed to load plugin {plugin_name}: {e}")
+            return None
+        finally:
+            current_plugin.reset(token)
+    
+    async def _setup_plugin(self, plugin_name: str, module) -> bool:
+        """Run a plugin's setup() and register it; False if setup failed"""
+        token = current_plugin.set(plugin_name)
+        try:
             # Check if plugin has setup function
+            started = time.perf_counter()
             if hasattr(module, "setup"):
                 await module.setup(self)
             
+            timings = self.plugin_timings.setdefault(plugin_name, {"import": 0.0, "lazy": False})
+            timings["setup"] = time.perf_counter() - started
+            
             # Register plugin
             self.plugins[plugin_name] = module
             self.loaded_plugins.add(plugin_name)
             
-            logger.info(f"✅ Loaded plugin: {plugin_name}")
+            version = self.plugin_manifests.get(plugin_name, {}).get("version")
+            logger.info(f"✅ Loaded plugin: {plugin_name}{f' v{version}' if version else ''}")
+            return True
             
         except Exception as e:
             logger.error(f"❌ Failed to load plugin {plugin_name}: {e}")
+            return False
+        finally:
+            current_plugin.reset(token)
+    
+    def _log_plugin_timings(self):
+        """Log per-plugin import and setup time, slowest first"""
+        ranked = sorted(
+            self.plugin_timings.items(),
+            key=lambda item: item[1]["import"] + item[1]["setup"],
+            reverse=True
+        )
+        for plugin_name, timings in ranked:
+            logger.info(
+                f"⏱️ {plugin_name}: import {timings['import'] * 1000:.1f}ms, "
+                f"setup {timings['setup'] * 1000:.1f}ms"
+            )
+    
+    def _register_lazy_plugin(self, plugin_name: str, commands: List[str]):
+        """Register stub commands that load the plugin on first use"""
+        self.lazy_plugins[plugin_name] = list(commands)
+        token = current_plugin.set(plugin_name)
+        try:
+            for command_name in commands:
+                self.add_command(
+                    command_name,
+                    self._make_lazy_handler(plugin_name, command_name),
+                    description=f"(loads {plugin_name} on first use)"
+                )
+                self.commands[command_name]["lazy"] = True
+        finally:
+            current_plugin.reset(token)
+    
+    def _make_lazy_handler(self, plugin_name: str, command_name: str):
+        """Build a stub handler that loads its plugin, then re-dispatches"""
+        async def lazy_handler(client, message):
+            if not await self.ensure_plugin(plugin_name):
+                return
+            entry = self.commands.get(command_name)
+            if entry is None or entry.get("lazy"):
+                logger.warning(f"Lazy plugin {plugin_name} did not register command {command_name}")
+                return
+            await entry["handler"](client, message)
+        
+        return lazy_handler
+    
+    async def ensure_plugin(self, plugin_name: str) -> bool:
+        """Load a lazy plugin once, sharing the load between concurrent callers"""
+        if plugin_name in self.loaded_plugins:
+            return True
+        
+        for dependency in self._plugin_dependencies.get(plugin_name, ()):
+            if not await self.ensure_plugin(dependency):
+                logger.error(f"❌ Cannot load {plugin_name}: dependency {dependency} failed to load")
+                return False
+        
+        task = self._plugin_loads.get(plugin_name)
+        if task is None:
+            logger.info(f"🔌 Loading lazy plugin on first use: {plugin_name}")
+            task = asyncio.ensure_future(self.load_plugin(plugin_name))
+            self._plugin_loads[plugin_name] = task
+        
+        try:
+            await asyncio.shield(task)
+        finally:
+            self._plugin_loads.pop(plugin_name, None)
+        
+        # Drop stubs for commands the plugin declared but never registered
+        for command_name in self.lazy_plugins.get(plugin_name, []):
+            entry = self.commands.get(command_name)
+            if entry is not None and entry.get("lazy"):
+                self.remove_command(command_name)
+        
+        return plugin_name in self.loaded_plugins
     
     async def unload_plugin(self, plugin_name: str):
-        """Unload a specific plugin"""
+        """Unload a specific plugin
+        
+        Its commands and Pyrogram handlers are removed first, running
+        invocations are allowed to finish, then cleanup() runs.
+        """
         try:
-            if plugin_name in self.plugins:
-                module = self.plugins[plugin_name]
-                
-                # Call cleanup function if available
-                if hasattr(module, "cleanup"):
-                    await module.cleanup(self)
-                
-                # Remove from loaded plugins
-                del self.plugins[plugin_name]
+            if plugin_name not in self.plugins:
+                return False
+            
+            async with self._reload_lock:
+                module = self.plugins.pop(plugin_name)
                 self.loaded_plugins.discard(plugin_name)
                 
+                old_commands = self._take_commands(plugin_name)
+                self.router.rebuild()
+                await self._swap_handlers(self._plugin_handlers.pop(plugin_name, []), [])
+                await self._retire_plugin(plugin_name, module, old_commands)
+                
                 # Remove from sys.modules
                 module_name = f"plugins.{plugin_name}"
-                if module_name in sys.modules:
+                if sys.modules.get(module_name) is module:
                     del sys.modules[module_name]
-                
-                logger.info(f"✅ Unloaded plugin: {plugin_name}")
-                return True
             
-            return False
+            logger.info(f"✅ Unloaded plugin: {plugin_name}")
+            return True
             
         except Exception as e:
             logger.error(f"❌ Failed to unload plugin {plugin_name}: {e}")
             return False
     
-    async def reload_plugin(self, plugin_name: str):
-        """Reload a specific plugin"""
-        await self.unload_plugin(plugin_name)
-        await self.load_plugin(plugin_name)
+    async def reload_plugin(self, plugin_name: str, module=None) -> bool:
+        """Replace a plugin with a new version without a gap in service
+        
+        The new module (imported here unless one is passed, e.g. shared by
+        several accounts) is set up next to the running one while its
+        commands and handlers are held back. The command table and the
+        Pyrogram handlers are then swapped in one step; invocations of the
+        old version drain before its cleanup() runs. If the import or
+        setup() fails the old version keeps running untouched. The manifest
+        is read again, so changed commands, laziness or dependencies apply.
+        """
+        await self._refresh_manifest(plugin_name)
+        manifest = self.plugin_manifests[plugin_name]
+        
+        if plugin_name not in self.plugins:
+            if plugin_name in self.lazy_plugins:
+                self._take_commands(plugin_name)
+                del self.lazy_plugins[plugin_name]
+                if manifest["lazy"] and manifest["commands"]:
+                    # Still lazy: fresh stubs, and the next use imports whatever is current
+                    self._register_lazy_plugin(plugin_name, manifest["commands"])
+                    return True
+                self.router.rebuild()
+            previous = sys.modules.get(f"plugins.{plugin_name}")
+            if module is None:
+                module = self._import_plugin(plugin_name, fresh=True)
+            if module is not None and await self._setup_plugin(plugin_name, module):
+                return True
+            self._restore_module(plugin_name, module, previous)
+            return False
+        
+        async with self._reload_lock:
+            old_module = self.plugins[plugin_name]
+            imported = module is None
+            if imported:
+                module = self._import_plugin(plugin_name, fresh=True)
+                if module is None:
+                    return False
+            
+            staged = self._staged_plugins[plugin_name] = {"commands": {}, "handlers": []}
+            try:
+                ok = await self._setup_plugin(plugin_name, module)
+            finally:
+                del self._staged_plugins[plugin_name]
+            if not ok:
+                self._restore_module(plugin_name, module, old_module)
+                logger.warning(f"⚠️ Kept the running version of {plugin_name}")
+                return False
+            
+            # No await between here and the rebuild: commands switch atomically
+            old_commands = self._take_commands(plugin_name)
+            self.commands.update(staged["commands"])
+            self.router.rebuild()
+            old_handlers = self._plugin_handlers.get(plugin_name, [])
+            self._plugin_handlers[plugin_name] = staged["handlers"]
+            await self._swap_handlers(old_handlers, staged["handlers"])
+            
+            await self._retire_plugin(plugin_name, old_module, old_commands)
+        
+        logger.info(f"🔁 Reloaded plugin: {plugin_name}")
+        return True
+    
+    async def _refresh_manifest(self, plugin_name: str):
+        """Re-read a changed plugin's manifest and the dependency map"""
+        path = self.config.PLUGINS_DIR / f"{plugin_name}.py"
+        self.plugin_manifests[plugin_name] = await asyncio.to_thread(read_plugin_meta, path)
+        self._plugin_dependencies, _ = resolve_dependencies(self.plugin_manifests)
+    
+    @staticmethod
+    def _restore_module(plugin_name: str, failed, previous):
+        """Point sys.modules back at the running version after a failed reload"""
+        module_name = f"plugins.{plugin_name}"
+        current = sys.modules.get(module_name)
+        if current is not None and current is not failed and current is not previous:
+            # Something newer was imported meanwhile
+            return
+        if previous is not None:
+            sys.modules[module_name] = previous
+        else:
+            sys.modules.pop(module_name, None)
+    
+    def _take_commands(self, plugin_name: str) -> List[Dict[str, Any]]:
+        """Remove a plugin's commands from the table (caller rebuilds the router)"""
+        entries = [entry for entry in self.commands.values() if entry.get("plugin") == plugin_name]
+        for entry in entries:
+            del self.commands[entry["name"]]
+        return entries
+    
+    async def _swap_handlers(self, old: List[Tuple[Any, int]], new: List[Tuple[Any, int]]):
+        """Replace Pyrogram handlers in one step
+        
+        Pyrogram's dispatcher workers hold their lock while running handlers,
+        so taking every lock waits for in-flight handlers to return and no
+        update is ever dispatched against a half-swapped set.
+        """
+        if not old and not new:
+            return
+        dispatcher = self.dispatcher
+        for lock in dispatcher.locks_list:
+            await lock.acquire()
+        try:
+            for handler, group in old:
+                handlers = dispatcher.groups.get(group)
+                if isinstance(handler, DisconnectHandler):
+                    self.disconnect_handler = None
+                elif handlers and handler in handlers:
+                    handlers.remove(handler)
+            for handler, group in new:
+                if isinstance(handler, DisconnectHandler):
+                    self.disconnect_handler = handler.callback
+                    continue
+                if group not in dispatcher.groups:
+                    dispatcher.groups[group] = []
+                    dispatcher.groups = OrderedDict(sorted(dispatcher.groups.items()))
+                dispatcher.groups[group].append(handler)
+        finally:
+            for lock in dispatcher.locks_list:
+                lock.release()
+    
+    async def _retire_plugin(self, plugin_name: str, module, commands: List[Dict[str, Any]]):
+        """Wait for a removed version's commands to finish, then run its cleanup()"""
+        deadline = time.monotonic() + self.config.RELOAD_DRAIN_TIMEOUT
+        while any(entry["active"] for entry in commands):
+            if time.monotonic() >= deadline:
+                logger.warning(f"⚠️ {plugin_name}: old version still running after drain timeout")
+                break
+            await asyncio.sleep(0.05)
+        
+        if not hasattr(module, "cleanup"):
+            return
+        # Sandboxed: registrations made by the old cleanup() never touch the live tables
+        token = current_plugin.set(plugin_name)
+        self._staged_plugins[plugin_name] = {"commands": {}, "handlers": []}
+        try:
+            await module.cleanup(self)
+        except Exception as e:
+            logger.error(f"❌ Cleanup of {plugin_name} failed: {e}")
+        finally:
+            del self._staged_plugins[plugin_name]
+            current_plugin.reset(token)
     
-    def add_command(self, command_name: str, handler, description: str = ""):
+    def add_command(
+        self,
+        command_name: str,
+        handler,
+        description: str = "",
+        aliases: Optional[List[str]] = None
+    ):
         """Add a command handler"""
-        self.commands[command_name] = {
+        plugin = current_plugin.get()
+        entry = {
+            "name": command_name,
             "handler": handler,
             "description": description,
-            "client_type": "assistant" if self.is_assistant else "userbot"
+            "aliases": list(aliases or []),
+            "plugin": plugin,
+            "client_type": "assistant" if self.is_assistant else "userbot",
+            # Invocations currently running (drained before a reload retires it)
+            "active": 0
         }
+        staged = self._staged_plugins.get(plugin)
+        if staged is not None:
+            staged["commands"][command_name] = entry
+            return
+        self.commands[command_name] = entry
+        self.router.rebuild()
+    
+    def remove_command(self, command_name: str) -> bool:
+        """Remove a command handler"""
+        staged = self._staged_plugins.get(current_plugin.get())
+        if staged is not None:
+            return staged["commands"].pop(command_name, None) is not None
+        if self.commands.pop(command_name, None) is None:
+            return False
+        self.router.rebuild()
+        return True
+    
+    def add_handler(self, handler, group: int = 0):
+        """Register a Pyrogram handler, remembering which plugin owns it
+
+        Message and edited-message handlers of plugins run on the update
+        scheduler rather than on Pyrogram's dispatcher, so a slow plugin
+        never holds up other updates (see _schedule_handler).
+        """
+        plugin = current_plugin.get()
+        if plugin is not None:
+            # Runs under the plugin's budget and attribution
+            handler.callback = self.budgets.wrap(plugin, handler.callback)
+            if isinstance(handler, (MessageHandler, EditedMessageHandler)):
+                handler.callback = self._schedule_handler(handler)
+            staged = self._staged_plugins.get(plugin)
+            if staged is not None:
+                staged["handlers"].append((handler, group))
+                return handler, group
+            self._plugin_handlers.setdefault(plugin, []).append((handler, group))
+        return super().add_handler(handler, group)
+    
+    def _schedule_handler(self, handler):
+        """Callback that queues a plugin message handler on the chat's lane
+
+        Filters still run on the dispatcher; only the callback is deferred.
+        Plain messages are low priority, so they are shed before commands
+        when the queue is full, and a newer edit of a message replaces a
+        still-queued one for the same handler. Deferred handlers cannot
+        stop propagation to later groups.
+        """
+        callback = handler.callback
+        if not inspect.iscoroutinefunction(callback):
+            # Pyrogram runs sync callbacks in its thread pool already
+            return callback
+        edited = isinstance(handler, EditedMessageHandler)
+
+        async def deferred(client, message: Message):
+            chat_id = message.chat.id if message.chat else None
+            coalesce_key = ("edit", id(handler), message.id) if edited else None
+            if not self.scheduler.submit(
+                chat_id, self._run_handler, callback, client, message,
+                priority=PRIORITY_LOW, coalesce_key=coalesce_key
+            ):
+                # Counted in the scheduler's shed metric
+                logger.debug(f"Update queue full, shed {getattr(callback, '__name__', 'handler')} in {chat_id}")
+
+        deferred.__wrapped__ = callback
+        return deferred
+
+    @staticmethod
+    async def _run_handler(callback, client, message: Message):
+        try:
+            await callback(client, message)
+        except (StopPropagation, ContinuePropagation):
+            # Off the dispatcher these have nothing left to control
+            pass
+
+    def remove_handler(self, handler, group: int = 0):
+        """Deregister a Pyrogram handler"""
+        plugin = current_plugin.get()
+        if plugin is not None:
+            staged = self._staged_plugins.get(plugin)
+            if staged is not None:
+                if (handler, group) in staged["handlers"]:
+                    staged["handlers"].remove((handler, group))
+                return
+            owned = self._plugin_handlers.get(plugin, [])
+            if (handler, group) in owned:
+                owned.remove((handler, group))
+        return super().remove_handler(handler, group)
     
     def _get_startup_message(self):
         """Get startup message for log group"""
@@ -217,14 +983,19 @@ class NexusClient(Client):
             f"**Prefix:** `{self.command_prefix}`"
         )
     
-    async def send_log(self, message: str, chat_id: Optional[int] = None):
-        """Send message to log group"""
-        try:
-            log_chat = chat_id or self.config.LOG_GROUP_ID
-            if log_chat:
-                await self.send_message(log_chat, message)
-        except Exception as e:
-            logger.warning(f"Failed to send log message: {e}")
+    async def send_log(self, message: str, chat_id: Optional[int] = None, key=None):
+        """Queue a message for the log group (sent in batches by the log sink)"""
+        self.queue_log(message, chat_id, key)
+    
+    def queue_log(self, message: str, chat_id: Optional[int] = None, key=None):
+        """Synchronous send_log for hot paths that must not await"""
+        log_chat = chat_id or self.config.LOG_GROUP_ID
+        if log_chat:
+            if not self._owns_log_sink and len(self.config.SESSION_STRINGS) > 1:
+                # Sink shared by several accounts - say which one this came from
+                message = f"👤 `{self.name}`\n{message}"
+                key = (self.name, key) if key is not None else None
+            self.log_sink.add(log_chat, message, key=key)
     
     async def handle_error(self, error: Exception, context: str = ""):
         """Handle and log errors"""
@@ -232,14 +1003,14 @@ class NexusClient(Client):
         logger.error(f"Error in {context}: {error}")
         
         if self.config.LOG_ERRORS:
-            await self.send_log(error_msg)
+            # Identical errors collapse into one line with a repeat counter
+            await self.send_log(error_msg, key=("error", context, type(error).__name__, str(error)))
     
     def get_uptime(self) -> str:
         """Get bot uptime"""
         if not self.start_time:
             return "Unknown"
         
-        import time
         uptime_seconds = int(time.time() - self.start_time)
         
         days = uptime_seconds // 86400
@@ -256,9 +1027,22 @@ class NexusClient(Client):
         else:
             return f"{seconds}s"
     
+    def get_health(self) -> Dict[str, Any]:
+        """Connection and queue state for health checks"""
+        return {
+            "connected": bool(self.is_connected),
+            "user": self.me.id if self.me else None,
+            "plugins": len(self.loaded_plugins),
+            "lazy_pending": len(set(self.lazy_plugins) - self.loaded_plugins),
+            "commands": len(self.commands),
+            "queue_depth": self.scheduler.depth,
+            "outbox_queued": self.outbox.depth,
+            "uptime": self.get_uptime(),
+        }
+    
     def is_sudo(self, user_id: int) -> bool:
-        """Check if user is sudo user"""
-        return user_id in self.config.SUDO_USERS or user_id == self.me.id
+        """Check if user is the owner or a sudo user"""
+        return self.permissions.is_sudo(user_id)
     
     async def restart(self):
         """Restart the client"""
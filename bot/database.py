@@ -0,0 +1,469 @@
+"""
+Storage backends for Nexus v2.0
+Async namespaced key-value store exposed to plugins as client.db
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A stored record: (json text, absolute expiry or None)
+Record = Tuple[str, Optional[float]]
+
+# Pending write: record to store, or None for a delete
+Pending = Optional[Record]
+
+
+class Namespace:
+    """Convenience view of one namespace, e.g. client.db.namespace("notes")"""
+
+    def __init__(self, db: "Database", name: str):
+        self.db = db
+        self.name = name
+
+    async def get(self, key, default=None):
+        return await self.db.get(self.name, key, default)
+
+    async def set(self, key, value, ttl: Optional[float] = None):
+        await self.db.set(self.name, key, value, ttl)
+
+    async def delete(self, key):
+        await self.db.delete(self.name, key)
+
+    async def get_many(self, keys: Iterable) -> Dict[str, Any]:
+        return await self.db.get_many(self.name, keys)
+
+    async def set_many(self, mapping: Dict[Any, Any], ttl: Optional[float] = None):
+        await self.db.set_many(self.name, mapping, ttl)
+
+    async def keys(self) -> List[str]:
+        return await self.db.keys(self.name)
+
+    async def items(self) -> Dict[str, Any]:
+        return await self.db.items(self.name)
+
+
+class Database:
+    """Async key-value store with namespaces, TTLs and batched writes
+
+    Values must be JSON serialisable. Writes are buffered and committed by a
+    background task in batches (every `flush_interval` seconds or once
+    `batch_size` writes are pending); reads see buffered writes
+    immediately. Call flush() when a write must be durable right away.
+    Backends implement _open/_close/_fetch/_scan/_write/_purge.
+    """
+
+    backend = "base"
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 0.2):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[str, str], Pending] = {}
+        # Batch being committed; reads still see it until the write returns
+        self._flushing: Dict[Tuple[str, str], Pending] = {}
+        self._ttls: Dict[str, float] = {}
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.reads = 0
+        self.writes = 0
+        self.flushes = 0
+
+    # Lifecycle
+
+    async def start(self):
+        """Open the backend and start the write-behind task"""
+        if self._task is not None:
+            return
+        await self._open()
+        self._task = asyncio.create_task(self._flush_loop(), name=f"db-{self.backend}")
+        logger.info(f"🗄️ Storage ready ({self.backend})")
+
+    async def close(self):
+        """Flush pending writes and close the backend"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self.flush()
+        await self._close()
+
+    async def _flush_loop(self):
+        last_purge = time.monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+            if time.monotonic() - last_purge > 60:
+                last_purge = time.monotonic()
+                try:
+                    await self._purge(time.time())
+                except Exception as e:
+                    logger.warning(f"Could not purge expired keys: {e}")
+
+    async def flush(self):
+        """Commit every buffered write in one batch"""
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            self._flushing = batch
+            try:
+                await self._write(batch)
+                self.flushes += 1
+            except Exception as e:
+                logger.error(f"❌ Storage flush failed ({len(batch)} writes kept for retry): {e}")
+                # Newer writes made during the failed flush win
+                batch.update(self._pending)
+                self._pending = batch
+            finally:
+                self._flushing = {}
+
+    # Public API
+
+    def namespace(self, name: str, ttl: Optional[float] = None) -> Namespace:
+        """Namespace view; `ttl` becomes the default TTL for its keys"""
+        if ttl is not None:
+            self._ttls[name] = ttl
+        return Namespace(self, name)
+
+    def set_namespace_ttl(self, name: str, ttl: Optional[float]):
+        """Default TTL (seconds) for keys written to `name` without one"""
+        if ttl is None:
+            self._ttls.pop(name, None)
+        else:
+            self._ttls[name] = ttl
+
+    async def get(self, namespace: str, key, default=None):
+        result = await self.get_many(namespace, [key])
+        return result.get(str(key), default)
+
+    async def get_many(self, namespace: str, keys: Iterable) -> Dict[str, Any]:
+        """Values for the given keys (missing/expired keys are omitted)"""
+        now = time.time()
+        result: Dict[str, Any] = {}
+        missing = []
+        for key in map(str, keys):
+            self.reads += 1
+            if (namespace, key) in self._pending:
+                record = self._pending[(namespace, key)]
+            elif (namespace, key) in self._flushing:
+                record = self._flushing[(namespace, key)]
+            else:
+                missing.append(key)
+                continue
+            if record is not None and (record[1] is None or record[1] > now):
+                result[key] = json.loads(record[0])
+
+        if missing:
+            for key, (raw, expires) in (await self._fetch(namespace, missing)).items():
+                if expires is None or expires > now:
+                    result[key] = json.loads(raw)
+        return result
+
+    async def set(self, namespace: str, key, value, ttl: Optional[float] = None):
+        self.set_nowait(namespace, key, value, ttl)
+
+    async def set_many(self, namespace: str, mapping: Dict[Any, Any], ttl: Optional[float] = None):
+        """Buffer several writes; they are committed together"""
+        self.set_many_nowait(namespace, mapping, ttl)
+
+    async def delete(self, namespace: str, key):
+        self.delete_nowait(namespace, key)
+
+    def set_nowait(self, namespace: str, key, value, ttl: Optional[float] = None):
+        """set() for synchronous code (writes only touch the buffer)"""
+        self.set_many_nowait(namespace, {key: value}, ttl)
+
+    def set_many_nowait(self, namespace: str, mapping: Dict[Any, Any], ttl: Optional[float] = None):
+        ttl = ttl if ttl is not None else self._ttls.get(namespace)
+        expires = time.time() + ttl if ttl else None
+        for key, value in mapping.items():
+            self._pending[(namespace, str(key))] = (json.dumps(value), expires)
+            self.writes += 1
+        self._maybe_wake()
+
+    def delete_nowait(self, namespace: str, key):
+        self._pending[(namespace, str(key))] = None
+        self.writes += 1
+        self._maybe_wake()
+
+    async def items(self, namespace: str) -> Dict[str, Any]:
+        """Every live key/value in a namespace"""
+        now = time.time()
+        records = await self._scan(namespace)
+        # The in-flight batch first, so newer buffered writes override it
+        for buffered in (self._flushing, self._pending):
+            for (ns, key), record in buffered.items():
+                if ns == namespace:
+                    if record is None:
+                        records.pop(key, None)
+                    else:
+                        records[key] = record
+        return {
+            key: json.loads(raw)
+            for key, (raw, expires) in records.items()
+            if expires is None or expires > now
+        }
+
+    async def keys(self, namespace: str) -> List[str]:
+        return list((await self.items(namespace)).keys())
+
+    def _maybe_wake(self):
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of storage metrics"""
+        return {
+            "backend": self.backend,
+            "pending": len(self._pending),
+            "reads": self.reads,
+            "writes": self.writes,
+            "flushes": self.flushes,
+        }
+
+    # Backend primitives
+
+    async def _open(self):
+        pass
+
+    async def _close(self):
+        pass
+
+    async def _fetch(self, namespace: str, keys: List[str]) -> Dict[str, Record]:
+        raise NotImplementedError
+
+    async def _scan(self, namespace: str) -> Dict[str, Record]:
+        raise NotImplementedError
+
+    async def _write(self, batch: Dict[Tuple[str, str], Pending]):
+        raise NotImplementedError
+
+    async def _purge(self, now: float):
+        pass
+
+
+class MemoryDatabase(Database):
+    """In-process backend for tests and throwaway deployments"""
+
+    backend = "memory"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._data: Dict[str, Dict[str, Record]] = {}
+
+    async def _fetch(self, namespace: str, keys: List[str]) -> Dict[str, Record]:
+        stored = self._data.get(namespace, {})
+        return {key: stored[key] for key in keys if key in stored}
+
+    async def _scan(self, namespace: str) -> Dict[str, Record]:
+        return dict(self._data.get(namespace, {}))
+
+    async def _write(self, batch: Dict[Tuple[str, str], Pending]):
+        for (namespace, key), record in batch.items():
+            if record is None:
+                self._data.get(namespace, {}).pop(key, None)
+            else:
+                self._data.setdefault(namespace, {})[key] = record
+
+    async def _purge(self, now: float):
+        for stored in self._data.values():
+            for key in [k for k, (_, expires) in stored.items() if expires is not None and expires <= now]:
+                del stored[key]
+
+
+class SQLiteDatabase(Database):
+    """SQLite backend in WAL mode with one connection per pool thread"""
+
+    backend = "sqlite"
+
+    def __init__(self, path: Path, pool_size: int = 4, **kwargs):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self.pool_size = pool_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        """Connection owned by the current pool thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="nexus-db")
+        await self._run(self._create_schema)
+
+    def _create_schema(self):
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires REAL,"
+            " PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_kv_expires ON kv (expires) WHERE expires IS NOT NULL")
+        conn.commit()
+
+    async def _close(self):
+        def close_all():
+            with self._connections_lock:
+                for conn in self._connections:
+                    conn.close()
+                self._connections.clear()
+
+        await self._run(close_all)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    async def _fetch(self, namespace: str, keys: List[str]) -> Dict[str, Record]:
+        def fetch():
+            conn = self._conn()
+            found = {}
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for key, value, expires in conn.execute(
+                    f"SELECT key, value, expires FROM kv WHERE namespace = ? AND key IN ({placeholders})",
+                    (namespace, *chunk)
+                ):
+                    found[key] = (value, expires)
+            return found
+
+        return await self._run(fetch)
+
+    async def _scan(self, namespace: str) -> Dict[str, Record]:
+        def scan():
+            rows = self._conn().execute(
+                "SELECT key, value, expires FROM kv WHERE namespace = ?", (namespace,)
+            )
+            return {key: (value, expires) for key, value, expires in rows}
+
+        return await self._run(scan)
+
+    async def _write(self, batch: Dict[Tuple[str, str], Pending]):
+        upserts = [(ns, key, rec[0], rec[1]) for (ns, key), rec in batch.items() if rec is not None]
+        deletes = [(ns, key) for (ns, key), rec in batch.items() if rec is None]
+
+        def write():
+            conn = self._conn()
+            with conn:
+                if upserts:
+                    conn.executemany(
+                        "REPLACE INTO kv (namespace, key, value, expires) VALUES (?, ?, ?, ?)", upserts
+                    )
+                if deletes:
+                    conn.executemany("DELETE FROM kv WHERE namespace = ? AND key = ?", deletes)
+
+        await self._run(write)
+
+    async def _purge(self, now: float):
+        def purge():
+            conn = self._conn()
+            with conn:
+                conn.execute("DELETE FROM kv WHERE expires IS NOT NULL AND expires <= ?", (now,))
+
+        await self._run(purge)
+
+
+class RedisDatabase(Database):
+    """Redis backend using a bounded connection pool"""
+
+    backend = "redis"
+
+    def __init__(self, url: str, pool_size: int = 10, prefix: str = "nexus", **kwargs):
+        # Optional dependency - only needed when a redis:// URL is configured
+        import redis.asyncio as redis
+
+        super().__init__(**kwargs)
+        self.prefix = prefix
+        self._pool = redis.ConnectionPool.from_url(url, max_connections=pool_size)
+        self._redis = redis.Redis(connection_pool=self._pool)
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    async def _close(self):
+        await self._redis.close()
+        await self._pool.disconnect()
+
+    async def _fetch(self, namespace: str, keys: List[str]) -> Dict[str, Record]:
+        values = await self._redis.mget([self._key(namespace, key) for key in keys])
+        return {key: (value, None) for key, value in zip(keys, values) if value is not None}
+
+    async def _scan(self, namespace: str) -> Dict[str, Record]:
+        prefix = self._key(namespace, "")
+        names = [name async for name in self._redis.scan_iter(match=f"{prefix}*")]
+        if not names:
+            return {}
+        values = await self._redis.mget(names)
+        return {
+            name.decode()[len(prefix):]: (value, None)
+            for name, value in zip(names, values)
+            if value is not None
+        }
+
+    async def _write(self, batch: Dict[Tuple[str, str], Pending]):
+        now = time.time()
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for (namespace, key), record in batch.items():
+                name = self._key(namespace, key)
+                if record is None:
+                    pipe.delete(name)
+                elif record[1] is None:
+                    pipe.set(name, record[0])
+                else:
+                    pipe.set(name, record[0], px=max(1, int((record[1] - now) * 1000)))
+            await pipe.execute()
+
+
+def create_database(config) -> Database:
+    """Build the backend selected by DATABASE_URL, else REDIS_URL (SQLite by default)"""
+    url = config.DATABASE_URL.strip() or config.REDIS_URL.strip()
+    default_path = config.BASE_DIR / "sessions" / "nexus.db"
+    options = {"batch_size": config.DB_BATCH_SIZE, "flush_interval": config.DB_FLUSH_INTERVAL}
+
+    if url.startswith(("redis://", "rediss://")):
+        try:
+            return RedisDatabase(url, pool_size=config.DB_POOL_SIZE, **options)
+        except ImportError:
+            logger.warning("Storage URL points to Redis but the redis package is not installed - using SQLite")
+    elif url.startswith("memory://"):
+        return MemoryDatabase(**options)
+    elif url.startswith("sqlite:///"):
+        return SQLiteDatabase(Path(url[len("sqlite:///"):]), pool_size=config.DB_POOL_SIZE, **options)
+    elif url:
+        logger.warning(f"Unsupported DATABASE_URL scheme, using SQLite at {default_path}")
+
+    return SQLiteDatabase(default_path, pool_size=config.DB_POOL_SIZE, **options)
@@ -0,0 +1,251 @@
+"""
+Download manager for Nexus v2.0
+Streaming, resumable, parallel-part media downloads deduplicated by file unique id
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import asyncio
+import json
+import logging
+import math
+import mimetypes
+import os
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Set, Tuple
+
+from .filecache import FileCache
+
+logger = logging.getLogger(__name__)
+
+# Telegram serves files in 1 MiB chunks (see Client.stream_media)
+CHUNK_SIZE = 1024 * 1024
+
+# Same order Pyrogram uses to find the media of a message
+MEDIA_TYPES = ("audio", "document", "photo", "sticker", "animation", "video", "voice", "video_note",
+               "new_chat_photo")
+
+# Persist the chunk index every N chunks so a crash loses little work
+INDEX_EVERY = 8
+
+
+def get_media(message):
+    """Return the downloadable media object of a message (or the media itself)"""
+    for kind in MEDIA_TYPES:
+        media = getattr(message, kind, None)
+        if media is not None:
+            return media
+    if getattr(message, "file_unique_id", None):
+        return message
+    raise ValueError("This message doesn't contain any downloadable media")
+
+
+def media_extension(media) -> str:
+    """Best-effort file extension for a media object"""
+    suffix = Path(getattr(media, "file_name", None) or "").suffix
+    if suffix:
+        return suffix
+    mime_type = getattr(media, "mime_type", None)
+    if mime_type:
+        return mimetypes.guess_extension(mime_type) or ""
+    return ".jpg" if type(media).__name__ == "Photo" else ""
+
+
+class _PartialFile:
+    """A `.part` file plus a sidecar index of the chunks already written"""
+
+    def __init__(self, path: Path, size: int):
+        self.path = path
+        self.part_path = path.with_name(path.name + ".part")
+        self.index_path = path.with_name(path.name + ".part.json")
+        self.size = size
+        self.done: Set[int] = set()
+        self._unsaved = 0
+        self.fd: Optional[int] = None
+
+    def open(self):
+        if self.part_path.exists() and self.index_path.exists():
+            try:
+                index = json.loads(self.index_path.read_text())
+                if index.get("size") == self.size:
+                    self.done = set(index.get("done", []))
+            except (OSError, ValueError) as e:
+                logger.debug(f"Ignoring unreadable index {self.index_path}: {e}")
+        self.fd = os.open(self.part_path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def write(self, index: int, chunk: bytes):
+        os.pwrite(self.fd, chunk, index * CHUNK_SIZE)
+        self.done.add(index)
+        self._unsaved += 1
+        if self._unsaved >= INDEX_EVERY:
+            self.save_index()
+
+    def save_index(self):
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        tmp_path.write_text(json.dumps({"size": self.size, "done": sorted(self.done)}))
+        os.replace(tmp_path, self.index_path)
+        self._unsaved = 0
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def commit(self):
+        """Move the finished file into place and drop the index"""
+        if self.size:
+            os.ftruncate(self.fd, self.size)
+        os.fsync(self.fd)
+        self.close()
+        os.replace(self.part_path, self.path)
+        self.index_path.unlink(missing_ok=True)
+
+
+class DownloadManager:
+    """Process-wide download scheduler
+
+    Finished files go into the content-addressed FileCache, so the same media
+    is downloaded once no matter which account or plugin asks for it.
+    Large files are split into runs of `part_size` chunks that are fetched
+    concurrently, written straight to disk with os.pwrite and recorded in a
+    chunk index so an interrupted download resumes where it stopped.
+    """
+
+    def __init__(self, cache: FileCache, concurrency: int = 4, parts: int = 4, part_size: int = 8):
+        self.cache = cache
+        self.parts = max(1, parts)
+        self.part_size = max(1, part_size)
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        # Metrics
+        self.downloads = 0
+        self.deduplicated = 0
+        self.resumed = 0
+        self.failed = 0
+        self.bytes_downloaded = 0
+
+    def lookup(self, media) -> Optional[Path]:
+        """Local path of an already downloaded media object, if any"""
+        return self.cache.lookup(media.file_unique_id)
+
+    async def download(self, client, message) -> Path:
+        """Download the media of a message (or a media object) and return its path"""
+        media = get_media(message)
+        unique_id = media.file_unique_id
+
+        path = self.lookup(media)
+        if path is not None:
+            self.deduplicated += 1
+            return path
+
+        pending = self._inflight.get(unique_id)
+        if pending is not None:
+            self.deduplicated += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[unique_id] = future
+        try:
+            path = await self._fetch(
+                client, media, self.cache.path_for(unique_id, media_extension(media))
+            )
+            # Index changes stay on the loop thread; only the JSON write is offloaded
+            self.cache.add(unique_id, path)
+            await asyncio.to_thread(self.cache.write_index, self.cache.snapshot())
+        except BaseException as e:
+            self.failed += 1
+            future.set_exception(e)
+            # Nobody else may be waiting - mark the exception as retrieved
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(unique_id, None)
+
+        self.downloads += 1
+        future.set_result(path)
+        return path
+
+    def _plan(self, partial: _PartialFile) -> List[Tuple[int, int]]:
+        """Split the missing chunks into (offset, limit) runs"""
+        total = math.ceil(partial.size / CHUNK_SIZE)
+        runs = []
+        start = None
+        for index in range(total + 1):
+            missing = index < total and index not in partial.done
+            if missing and start is None:
+                start = index
+            if start is not None and (not missing or index - start == self.part_size):
+                runs.append((start, index - start))
+                start = index if missing else None
+        return runs
+
+    async def _fetch(self, client, media, path: Path) -> Path:
+        size = getattr(media, "file_size", 0) or 0
+        partial = _PartialFile(path, size)
+        await asyncio.to_thread(partial.open)
+        if partial.done:
+            self.resumed += 1
+            logger.info(f"⏯️ Resuming {path.name} ({len(partial.done)} chunks already on disk)")
+
+        try:
+            if size:
+                runs = asyncio.Queue()
+                for run in self._plan(partial):
+                    runs.put_nowait(run)
+                workers = [
+                    asyncio.create_task(self._run_worker(client, media.file_id, partial, runs))
+                    for _ in range(min(self.parts, runs.qsize()))
+                ]
+                try:
+                    await asyncio.gather(*workers)
+                finally:
+                    # One failed part stops the rest before the file is closed
+                    for worker in workers:
+                        worker.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+            else:
+                # Unknown size: stream sequentially after the contiguous prefix
+                offset = 0
+                while offset in partial.done:
+                    offset += 1
+                await self._stream(client, media.file_id, partial, offset, 0)
+
+            await asyncio.to_thread(partial.commit)
+        finally:
+            if partial.fd is not None:
+                await asyncio.to_thread(self._suspend, partial)
+        return path
+
+    @staticmethod
+    def _suspend(partial: _PartialFile):
+        """Keep what was written so the next attempt can resume"""
+        try:
+            partial.save_index()
+        finally:
+            partial.close()
+
+    async def _run_worker(self, client, file_id: str, partial: _PartialFile, runs: asyncio.Queue):
+        while not runs.empty():
+            offset, limit = runs.get_nowait()
+            await self._stream(client, file_id, partial, offset, limit)
+
+    async def _stream(self, client, file_id: str, partial: _PartialFile, offset: int, limit: int):
+        async with self._slots:
+            index = offset
+            async for chunk in client.stream_media(file_id, limit=limit, offset=offset):
+                await asyncio.to_thread(partial.write, index, chunk)
+                self.bytes_downloaded += len(chunk)
+                index += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of download metrics"""
+        return {
+            "inflight": len(self._inflight),
+            "downloads": self.downloads,
+            "deduplicated": self.deduplicated,
+            "resumed": self.resumed,
+            "failed": self.failed,
+            "bytes": self.bytes_downloaded,
+        }
@@ -0,0 +1,203 @@
+"""
+File cache for Nexus v2.0
+Content-addressed, size-bounded cache of downloaded media keyed by file unique id
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "index.json"
+
+# Interrupted downloads older than this are given up on
+STALE_PARTIAL_AGE = 24 * 3600
+
+
+class FileCache:
+    """Media files named `<file_unique_id><ext>` with an LRU index on disk
+
+    Only files recorded in the index are ever evicted, so anything else a
+    plugin keeps in the same directory is left alone. Every write - media
+    and index alike - goes to a temporary file first and is moved into
+    place with os.replace, so readers never see a half-written file.
+
+    The index is only touched from the event loop thread. Async callers
+    take a snapshot() there and hand just the JSON write (write_index) to
+    a worker thread.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = 1024 ** 3):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.index_path = self.directory / INDEX_NAME
+        # unique_id -> (file name, size); ordered oldest -> most recently used
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.total_bytes = 0
+        self._dirty = False
+        # Snapshots are numbered so a slow writer never replaces a newer index
+        self._version = 0
+        self._written = 0
+        self._write_lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load()
+
+    def _load(self):
+        """Read the index, forgetting entries whose file has disappeared"""
+        try:
+            entries = json.loads(self.index_path.read_text())
+        except FileNotFoundError:
+            entries = []
+        except (OSError, ValueError) as e:
+            logger.warning(f"File cache index unreadable, starting empty: {e}")
+            entries = []
+
+        for unique_id, name, size in entries:
+            if (self.directory / name).exists():
+                self._entries[unique_id] = (name, size)
+                self.total_bytes += size
+            else:
+                self._dirty = True
+
+        self._remove_stale_partials()
+        self._evict()
+
+    def _remove_stale_partials(self):
+        cutoff = time.time() - STALE_PARTIAL_AGE
+        for path in self.directory.glob("*.part*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+
+    def __contains__(self, unique_id: str) -> bool:
+        return unique_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def path_for(self, unique_id: str, extension: str = "") -> Path:
+        """Where a file with this unique id is (or will be) stored"""
+        entry = self._entries.get(unique_id)
+        if entry is not None:
+            return self.directory / entry[0]
+        return self.directory / f"{unique_id}{extension}"
+
+    def lookup(self, unique_id: str) -> Optional[Path]:
+        """Local path of a cached file, or None (never touches the network)"""
+        entry = self._entries.get(unique_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        path = self.directory / entry[0]
+        if not path.exists():
+            self._forget(unique_id)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(unique_id)
+        self._dirty = True
+        self.hits += 1
+        return path
+
+    def add(self, unique_id: str, path: Path) -> Path:
+        """Record a file already moved into the cache directory (index only, see save)"""
+        path = Path(path)
+        self._forget(unique_id)
+        size = path.stat().st_size
+        self._entries[unique_id] = (path.name, size)
+        self.total_bytes += size
+        self._dirty = True
+        self._evict(keep=unique_id)
+        return path
+
+    def store(self, unique_id: str, data: bytes, extension: str = "") -> Path:
+        """Atomically write bytes into the cache and return their path"""
+        path = self.path_for(unique_id, extension)
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        self.add(unique_id, path)
+        self.save()
+        return path
+
+    def _forget(self, unique_id: str):
+        entry = self._entries.pop(unique_id, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+            self._dirty = True
+
+    def _evict(self, keep: Optional[str] = None):
+        """Delete least recently used files until the cache fits its budget"""
+        for unique_id in list(self._entries):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if unique_id == keep:
+                continue
+            name, _ = self._entries[unique_id]
+            self._forget(unique_id)
+            try:
+                (self.directory / name).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Could not evict {name}: {e}")
+            self.evictions += 1
+
+    def save(self):
+        """Write the index if it changed"""
+        self.write_index(self.snapshot())
+
+    def snapshot(self) -> Optional[Tuple[int, str]]:
+        """Serialized index if it changed since the last snapshot, else None"""
+        if not self._dirty:
+            return None
+        entries = [[unique_id, name, size] for unique_id, (name, size) in self._entries.items()]
+        self._dirty = False
+        self._version += 1
+        return self._version, json.dumps(entries)
+
+    def write_index(self, snapshot: Optional[Tuple[int, str]]):
+        """Atomically write a snapshot to disk (safe from any thread)"""
+        if snapshot is None:
+            return
+        version, text = snapshot
+        with self._write_lock:
+            if version <= self._written:
+                return
+            tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+            tmp_path.write_text(text)
+            os.replace(tmp_path, self.index_path)
+            self._written = version
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of cache metrics"""
+        return {
+            "files": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,200 @@
+"""
+History engine for Nexus v2.0
+Prefetching, rate-limited, checkpointed chat history scans and batched bulk actions
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import asyncio
+import logging
+from functools import partial
+from typing import Optional, Dict, Any, AsyncIterator, List, Union, Iterable, AsyncIterable
+
+from pyrogram import raw, utils
+from pyrogram.errors import FloodWait
+from pyrogram.types import Message
+
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Largest page messages.getHistory returns and most ids per delete/forward call
+PAGE_SIZE = 100
+BATCH_SIZE = 100
+
+CHECKPOINTS = "history_checkpoints"
+
+
+async def _batches(items: Union[Iterable, AsyncIterable], size: int) -> AsyncIterator[List[int]]:
+    """Group message ids (or messages) from a sync or async iterable"""
+    batch = []
+
+    def add(item):
+        batch.append(int(getattr(item, "id", item)))
+
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            add(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    else:
+        for item in items:
+            add(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+class HistoryEngine:
+    """Chat history access shared by every plugin on one account
+
+    Pages are fetched by a background producer up to `prefetch` pages ahead
+    of the consumer, all scans on the account share one page-rate bucket,
+    and FloodWaits are waited out instead of failing the scan. A named
+    checkpoint stores the last message id the consumer finished with in
+    client.db, so a scan that is interrupted resumes where it stopped.
+    """
+
+    def __init__(self, client, rate: float = 3.0, prefetch: int = 2):
+        self.client = client
+        self.prefetch = max(1, prefetch)
+        self._pages = TokenBucket(rate, max(rate, 1.0))
+
+        # Metrics
+        self.pages = 0
+        self.messages = 0
+        self.flood_waits = 0
+
+    def _checkpoint_key(self, checkpoint: str, chat_id) -> str:
+        return f"{self.client.name}:{checkpoint}:{chat_id}"
+
+    async def get_checkpoint(self, checkpoint: str, chat_id) -> int:
+        """Last message id a named scan handed out in a chat (0 if none)"""
+        return await self.client.db.get(CHECKPOINTS, self._checkpoint_key(checkpoint, chat_id), 0)
+
+    async def reset_checkpoint(self, checkpoint: str, chat_id):
+        """Make a named scan start from the newest message again"""
+        await self.client.db.delete(CHECKPOINTS, self._checkpoint_key(checkpoint, chat_id))
+
+    async def _fetch_page(self, peer, offset_id: int, limit: int) -> List[Message]:
+        while True:
+            await self._pages.acquire()
+            try:
+                messages = await self.client.invoke(
+                    raw.functions.messages.GetHistory(
+                        peer=peer,
+                        offset_id=offset_id,
+                        offset_date=0,
+                        add_offset=0,
+                        limit=limit,
+                        max_id=0,
+                        min_id=0,
+                        hash=0
+                    ),
+                    sleep_threshold=0
+                )
+            except FloodWait as e:
+                self.flood_waits += 1
+                logger.info(f"⏳ History scan waiting {e.value}s (FloodWait)")
+                await asyncio.sleep(e.value)
+                continue
+            self.pages += 1
+            return await utils.parse_messages(self.client, messages, replies=0)
+
+    async def _produce(self, chat_id, offset_id: int, limit: int, min_id: int, pages: asyncio.Queue):
+        try:
+            peer = await self.client.resolve_peer(chat_id)
+            remaining = limit
+            while True:
+                size = min(PAGE_SIZE, remaining) if limit else PAGE_SIZE
+                page = await self._fetch_page(peer, offset_id, size)
+                if not page:
+                    break
+                offset_id = page[-1].id
+                reached_min = bool(min_id) and offset_id <= min_id
+                if reached_min:
+                    page = [message for message in page if message.id > min_id]
+                if page:
+                    await pages.put(page)
+                    remaining -= len(page)
+                if reached_min or (limit and remaining <= 0):
+                    break
+            await pages.put(None)
+        except Exception as e:
+            await pages.put(e)
+
+    async def iter(
+        self,
+        chat_id,
+        limit: int = 0,
+        offset_id: int = 0,
+        min_id: int = 0,
+        checkpoint: Optional[str] = None
+    ) -> AsyncIterator[Message]:
+        """Yield messages from newest to oldest
+
+        offset_id starts below a given message and min_id stops at one. With
+        `checkpoint`, the scan resumes at the last message whose processing
+        it did not see finish (delivery is at-least-once) and the
+        checkpoint is cleared once the history is exhausted.
+        """
+        if checkpoint is not None:
+            offset_id = await self.get_checkpoint(checkpoint, chat_id) or offset_id
+
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch)
+        producer = asyncio.create_task(self._produce(chat_id, offset_id, limit, min_id, pages))
+        exhausted = False
+        try:
+            while True:
+                page = await pages.get()
+                if page is None:
+                    exhausted = True
+                    break
+                if isinstance(page, Exception):
+                    raise page
+                for message in page:
+                    yield message
+                    self.messages += 1
+                    if checkpoint is not None:
+                        await self.client.db.set(
+                            CHECKPOINTS, self._checkpoint_key(checkpoint, chat_id), message.id
+                        )
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+        if exhausted and checkpoint is not None and not limit:
+            await self.reset_checkpoint(checkpoint, chat_id)
+
+    async def delete(self, chat_id, message_ids, revoke: bool = True) -> int:
+        """Delete ids (or messages, sync or async iterable) in calls of 100"""
+        deleted = 0
+        async for batch in _batches(message_ids, BATCH_SIZE):
+            deleted += await self.client.outbox.submit(
+                chat_id,
+                partial(self.client.delete_messages, chat_id, batch, revoke=revoke)
+            ) or 0
+        return deleted
+
+    async def forward(self, chat_id, from_chat_id, message_ids, **kwargs) -> List[Message]:
+        """Forward ids (or messages, sync or async iterable) in calls of 100"""
+        forwarded = []
+        async for batch in _batches(message_ids, BATCH_SIZE):
+            result = await self.client.outbox.submit(
+                chat_id,
+                partial(self.client.forward_messages, chat_id, from_chat_id, batch, **kwargs)
+            )
+            forwarded.extend(result if isinstance(result, list) else [result])
+        return forwarded
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of history metrics"""
+        return {
+            "pages": self.pages,
+            "messages": self.messages,
+            "flood_waits": self.flood_waits,
+        }
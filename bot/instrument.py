@@ -0,0 +1,97 @@
+"""
+Handler instrumentation for Nexus v2.0
+Wall, RPC and CPU time accounting for coroutines
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Optional, List
+
+# Stats of the handler invocation running in the current context; NexusClient
+# adds the time spent waiting on Telegram to it
+current_invocation: ContextVar[Optional["InvocationStats"]] = ContextVar("current_invocation", default=None)
+
+
+class InvocationStats:
+    """Timing breakdown of one handler invocation (seconds)"""
+
+    __slots__ = ("wall", "rpc", "cpu", "rpc_calls")
+
+    def __init__(self):
+        self.wall = 0.0
+        self.rpc = 0.0
+        self.cpu = 0.0
+        self.rpc_calls = 0
+
+    def add_rpc(self, seconds: float):
+        self.rpc += seconds
+        self.rpc_calls += 1
+
+
+class _Measured:
+    """Awaitable that drives a coroutine and charges its CPU time to `stats`
+
+    Each step of the wrapped coroutine runs between two thread_time() reads,
+    so only time actually spent executing it is counted - not time other
+    tasks ran while it was suspended.
+    """
+
+    __slots__ = ("coro", "stats")
+
+    def __init__(self, coro, stats: InvocationStats):
+        self.coro = coro
+        self.stats = stats
+
+    def __await__(self):
+        coro = self.coro
+        stats = self.stats
+        value = None
+        error = None
+        while True:
+            started = time.thread_time()
+            try:
+                if error is not None:
+                    pending, error = error, None
+                    yielded = coro.throw(pending)
+                else:
+                    yielded = coro.send(value)
+            except StopIteration as e:
+                stats.cpu += time.thread_time() - started
+                return e.value
+            except BaseException:
+                stats.cpu += time.thread_time() - started
+                raise
+            stats.cpu += time.thread_time() - started
+
+            try:
+                value = yield yielded
+            except GeneratorExit:
+                coro.close()
+                raise
+            except BaseException as e:
+                value = None
+                error = e
+
+
+def measure(coro, stats: InvocationStats) -> _Measured:
+    """Await `coro` while accumulating its CPU time into `stats`"""
+    return _Measured(coro, stats)
+
+
+def coroutine_stack(coro, limit: int = 25) -> List[str]:
+    """Current await chain of a suspended coroutine, outermost first"""
+    lines = []
+    while coro is not None and len(lines) < limit:
+        frame = (
+            getattr(coro, "cr_frame", None)
+            or getattr(coro, "gi_frame", None)
+            or getattr(coro, "ag_frame", None)
+        )
+        if frame is None:
+            break
+        lines.append(f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}")
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return lines
@@ -6,13 +6,58 @@ GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
 License: MIT
 """
 
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import multiprocessing
+import queue
 import sys
 from pathlib import Path
 import os
 
+# Background listener that owns the real (blocking) handlers
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line for log shippers"""
+
+    def format(self, record):
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread
+
+    The stock handler formats every record in the calling thread. Here only
+    the message arguments are merged (so later mutation cannot change the
+    log line); timestamps and tracebacks are rendered in the background.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
 def setup_logging():
     """Setup logging configuration for Nexus"""
+    global _listener
+    
+    # CPU worker processes re-import main; only the parent owns the log files
+    if multiprocessing.parent_process() is not None:
+        return
     
     # Create logs directory
     logs_dir = Path("logs")
@@ -21,17 +66,43 @@ def setup_logging():
     # Log level from environment
     log_level = os.getenv("LOG_LEVEL", "INFO").upper()
     
-    # Format for logs
+    # Format for logs (LOG_FORMAT=json for structured output)
     log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(log_format)
+    
+    # Size-based rotation keeps logs/nexus.log bounded
+    max_bytes = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    backup_count = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    
+    stream_handler = logging.StreamHandler(sys.stdout)
+    file_handler = logging.handlers.RotatingFileHandler(
+        logs_dir / "nexus.log",
+        maxBytes=max_bytes,
+        backupCount=backup_count,
+        encoding="utf-8",
+    )
+    for handler in (stream_handler, file_handler):
+        handler.setFormatter(formatter)
+    
+    # Stop a previous listener if setup_logging is called twice
+    stop_logging()
+    
+    # Callers only enqueue records; a background thread formats and writes them
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, file_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(stop_logging)
     
     # Configure root logger
     logging.basicConfig(
         level=getattr(logging, log_level, logging.INFO),
-        format=log_format,
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler(logs_dir / "nexus.log", encoding="utf-8"),
-        ]
+        handlers=[DeferredQueueHandler(log_queue)],
+        force=True,
     )
     
     # Set specific logger levels
@@ -42,4 +113,15 @@ def setup_logging():
     logger = logging.getLogger(__name__)
     logger.info("🚀 Nexus v2.0 logging initialized")
     
-    return logger
\ No newline at end of file
+    return logger
+
+
+def stop_logging():
+    """Flush queued records and stop the background listener"""
+    global _listener
+    
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,184 @@
+"""
+Log group sink for Nexus v2.0
+Buffers, deduplicates and batches messages sent to LOG_GROUP_ID
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Awaitable, Callable, Hashable, List
+
+logger = logging.getLogger(__name__)
+
+TRUNCATED = "\n…(truncated)"
+
+
+class _Entry:
+    """A buffered log line and how many times it was seen"""
+
+    __slots__ = ("text", "count")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.count = 1
+
+    def render(self, limit: int) -> str:
+        """The line as posted, truncated so it fits in `limit` with its counter"""
+        suffix = f"\n🔁 repeated {self.count}x" if self.count > 1 else ""
+        text = self.text
+        if len(text) + len(suffix) > limit:
+            text = text[:max(0, limit - len(suffix) - len(TRUNCATED))] + TRUNCATED
+        return text + suffix
+
+
+class LogSink:
+    """Collect log events and post them as combined messages
+
+    Identical events (same dedup key) are folded into one line with a repeat
+    counter. Buffers are flushed every `interval` seconds, or as soon as one
+    chat has `max_length` characters waiting. Once `max_entries` distinct
+    events are buffered, new events are only written to the local log until
+    the next flush.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Any, str], Awaitable[Any]],
+        max_length: int = 4096,
+        interval: float = 5.0,
+        max_entries: int = 200
+    ):
+        self._send = send
+        self.max_length = max_length
+        self.interval = interval
+        self.max_entries = max_entries
+
+        self._buffers: Dict[Any, "OrderedDict[Hashable, _Entry]"] = {}
+        self._sizes: Dict[Any, int] = {}
+        self._entries = 0
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.events = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self._dropped_since_flush = 0
+        self.messages_sent = 0
+
+    def start(self):
+        """Start the background flush loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="log-sink")
+
+    async def stop(self):
+        """Stop the flush loop and send whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def add(self, chat_id: Any, text: str, key: Optional[Hashable] = None):
+        """Buffer `text` for `chat_id`; events with the same key are merged"""
+        self.events += 1
+        key = key if key is not None else text
+        buffer = self._buffers.setdefault(chat_id, OrderedDict())
+
+        entry = buffer.get(key)
+        if entry is not None:
+            entry.count += 1
+            self.deduplicated += 1
+            return
+
+        if self._entries >= self.max_entries:
+            # Degrade to local-only logging until the buffer drains
+            self.dropped += 1
+            self._dropped_since_flush += 1
+            logger.info(f"[log sink full] {text}")
+            return
+
+        if len(text) > self.max_length:
+            # One extra character is enough for render() to know it was cut
+            text = text[:self.max_length + 1]
+
+        buffer[key] = _Entry(text)
+        self._entries += 1
+        self._sizes[chat_id] = self._sizes.get(chat_id, 0) + len(text) + 2
+
+        if self._sizes[chat_id] >= self.max_length:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def _take(self) -> Dict[Any, List[str]]:
+        """Detach the current buffers so new events go to fresh ones"""
+        buffers, self._buffers = self._buffers, {}
+        self._sizes = {}
+        self._entries = 0
+        return {
+            chat_id: [entry.render(self.max_length) for entry in buffer.values()]
+            for chat_id, buffer in buffers.items()
+            if buffer
+        }
+
+    def _pack(self, lines: List[str]) -> List[str]:
+        """Join lines into as few messages as fit within max_length"""
+        messages = []
+        current = ""
+        for line in lines:
+            # Lines are rendered to fit, but never send anything Telegram would reject
+            while len(line) > self.max_length:
+                if current:
+                    messages.append(current)
+                    current = ""
+                messages.append(line[:self.max_length])
+                line = line[self.max_length:]
+            candidate = f"{current}\n\n{line}" if current else line
+            if len(candidate) > self.max_length and current:
+                messages.append(current)
+                current = line
+            else:
+                current = candidate
+        if current:
+            messages.append(current)
+        return messages
+
+    async def flush(self):
+        """Send every buffered event as combined messages"""
+        pending = self._take()
+        dropped, self._dropped_since_flush = self._dropped_since_flush, 0
+
+        if dropped and pending:
+            first_chat = next(iter(pending))
+            pending[first_chat].insert(
+                0, f"⚠️ **{dropped} log events dropped** (buffer full) - see local logs"
+            )
+
+        for chat_id, lines in pending.items():
+            for text in self._pack(lines):
+                try:
+                    await self._send(chat_id, text)
+                    self.messages_sent += 1
+                except Exception as e:
+                    logger.warning(f"Failed to send log message: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of sink metrics"""
+        return {
+            "buffered": self._entries,
+            "events": self.events,
+            "deduplicated": self.deduplicated,
+            "dropped": self.dropped,
+            "messages_sent": self.messages_sent,
+        }
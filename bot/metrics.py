@@ -0,0 +1,395 @@
+"""
+Metrics for Nexus v2.0
+Hot-path counters and Prometheus text exposition
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import logging
+import math
+import os
+from bisect import bisect_left
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Recent invocations kept per command for percentiles
+SAMPLE_WINDOW = 1024
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative counts are computed on render)"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, count) pairs including +Inf"""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((repr(bound), total))
+        result.append(("+Inf", total + self.counts[-1]))
+        return result
+
+
+class ClientMetrics:
+    """Counters a client records while handling updates"""
+
+    def __init__(self):
+        self.updates_received = 0
+        self.command_calls: Dict[str, int] = {}
+        self.command_errors: Dict[str, int] = {}
+        self.command_latency: Dict[str, Histogram] = {}
+        self.command_rpc: Dict[str, float] = {}
+        self.command_cpu: Dict[str, float] = {}
+        self.command_samples: Dict[str, deque] = {}
+
+    def observe_command(
+        self,
+        command: str,
+        seconds: float,
+        failed: bool = False,
+        rpc: float = 0.0,
+        cpu: float = 0.0
+    ):
+        """Record one command invocation"""
+        self.command_calls[command] = self.command_calls.get(command, 0) + 1
+        if failed:
+            self.command_errors[command] = self.command_errors.get(command, 0) + 1
+        self.command_rpc[command] = self.command_rpc.get(command, 0.0) + rpc
+        self.command_cpu[command] = self.command_cpu.get(command, 0.0) + cpu
+
+        histogram = self.command_latency.get(command)
+        if histogram is None:
+            histogram = self.command_latency[command] = Histogram()
+            self.command_samples[command] = deque(maxlen=SAMPLE_WINDOW)
+        histogram.observe(seconds)
+        self.command_samples[command].append(seconds)
+
+    def get_command_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-command call counts, p50/p95/p99 wall time and RPC/CPU share"""
+        stats = {}
+        for command, samples in self.command_samples.items():
+            ordered = sorted(samples)
+            histogram = self.command_latency[command]
+            stats[command] = {
+                "calls": self.command_calls[command],
+                "errors": self.command_errors.get(command, 0),
+                "p50": percentile(ordered, 0.50),
+                "p95": percentile(ordered, 0.95),
+                "p99": percentile(ordered, 0.99),
+                "rpc_share": self.command_rpc[command] / histogram.sum if histogram.sum else 0.0,
+                "cpu_share": self.command_cpu[command] / histogram.sum if histogram.sum else 0.0,
+            }
+        return stats
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class MetricsWriter:
+    """Collect samples and render them in Prometheus text format"""
+
+    def __init__(self):
+        self._families: Dict[str, Dict[str, Any]] = {}
+
+    def add(
+        self,
+        name: str,
+        value: float,
+        labels: Optional[Dict[str, Any]] = None,
+        kind: str = "gauge",
+        help_text: str = ""
+    ):
+        """Add one sample; samples of a family are grouped on render"""
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = {"kind": kind, "help": help_text, "samples": []}
+        family["samples"].append(("", labels or {}, value))
+
+    def add_histogram(
+        self,
+        name: str,
+        histogram: Histogram,
+        labels: Optional[Dict[str, Any]] = None,
+        help_text: str = ""
+    ):
+        """Add a histogram's buckets, sum and count"""
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = {"kind": "histogram", "help": help_text, "samples": []}
+        labels = labels or {}
+        for le, count in histogram.cumulative():
+            family["samples"].append(("_bucket", {**labels, "le": le}, count))
+        family["samples"].append(("_sum", labels, histogram.sum))
+        family["samples"].append(("_count", labels, histogram.count))
+
+    def render(self) -> str:
+        lines = []
+        for name, family in self._families.items():
+            if family["help"]:
+                lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            for suffix, labels, value in family["samples"]:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def collect_client(writer: MetricsWriter, label: str, client):
+    """Add one NexusClient's metrics, labelled with client=`label`"""
+    base = {"client": label}
+    metrics = client.metrics
+
+    writer.add("nexus_client_connected", int(bool(client.is_connected)), base,
+               help_text="Whether the client is connected to Telegram")
+    writer.add("nexus_plugins_loaded", len(client.loaded_plugins), base,
+               help_text="Plugins currently loaded")
+
+    # Updates
+    scheduler = client.scheduler.get_stats()
+    writer.add("nexus_updates_received_total", metrics.updates_received, base, "counter",
+               "Message updates seen by the command router")
+    writer.add("nexus_updates_handled_total", scheduler["processed"], base, "counter",
+               "Queued updates that finished running")
+    writer.add("nexus_updates_failed_total", scheduler["failed"], base, "counter",
+               "Queued updates that raised")
+    writer.add("nexus_updates_shed_total", scheduler["shed"], base, "counter",
+               "Updates dropped because the queue was full")
+    writer.add("nexus_update_queue_depth", scheduler["depth"], base,
+               help_text="Updates waiting for a worker")
+    writer.add("nexus_update_wait_seconds_avg", scheduler["wait_avg"], base,
+               help_text="Average time an update waited in the queue")
+    writer.add("nexus_update_wait_seconds_max", scheduler["wait_max"], base,
+               help_text="Longest time an update waited in the queue")
+
+    # Commands
+    for command, calls in metrics.command_calls.items():
+        labels = {**base, "command": command}
+        writer.add("nexus_command_invocations_total", calls, labels, "counter",
+                   "Command handler invocations")
+        writer.add("nexus_command_errors_total", metrics.command_errors.get(command, 0), labels, "counter",
+                   "Command handler invocations that raised")
+        writer.add("nexus_command_rpc_seconds_total", metrics.command_rpc.get(command, 0.0), labels, "counter",
+                   "Time command handlers spent waiting on Telegram")
+        writer.add("nexus_command_cpu_seconds_total", metrics.command_cpu.get(command, 0.0), labels, "counter",
+                   "CPU time spent executing command handlers")
+    for command, histogram in metrics.command_latency.items():
+        writer.add_histogram("nexus_command_duration_seconds", histogram, {**base, "command": command},
+                             "Command handler wall time")
+
+    # Permissions
+    permissions = client.permissions.get_stats()
+    writer.add("nexus_permission_denied_total", permissions["denied"], base, "counter",
+               "Commands refused because the sender lacks permission")
+    writer.add("nexus_sudo_users", permissions["sudo"], base,
+               help_text="Users with sudo rights")
+    writer.add("nexus_permission_grants", permissions["grants"], base,
+               help_text="Per-plugin and per-command grants")
+
+    # Anti-spam
+    if client.antispam is not None:
+        spam = client.antispam.get_stats()
+        writer.add("nexus_spam_dropped_total", spam["dropped"], base, "counter",
+                   "Commands dropped by the anti-spam limiter")
+        writer.add("nexus_spam_ignored_updates_total", spam["ignored_updates"], base, "counter",
+                   "Updates discarded because the sender is ignored")
+        writer.add("nexus_spam_ignored_users", spam["ignored_users"], base,
+                   help_text="Users currently on the ignore list")
+
+    # PM permit
+    if client.pm_permit is not None:
+        pm = client.pm_permit.get_stats()
+        writer.add("nexus_pm_checked_total", pm["checked"], base, "counter",
+                   "Private messages checked by PM permit")
+        writer.add("nexus_pm_warnings_total", pm["warned"], base, "counter",
+                   "Warning replies sent to unapproved senders")
+        writer.add("nexus_pm_blocks_total", pm["blocks"], base, "counter",
+                   "Senders blocked after too many warnings")
+
+    # Outbound
+    outbox = client.outbox.get_stats()
+    writer.add("nexus_outbound_sent_total", outbox["sent"], base, "counter",
+               "Outbound API calls sent")
+    writer.add("nexus_outbound_failed_total", outbox["failed"], base, "counter",
+               "Outbound API calls that failed")
+    writer.add("nexus_outbound_merged_total", outbox["merged"], base, "counter",
+               "Queued edits merged into a newer one")
+    writer.add("nexus_outbound_queued", outbox["queued"], base,
+               help_text="Outbound API calls waiting to be sent")
+    writer.add("nexus_flood_waits_total", outbox["flood_waits"], base, "counter",
+               "FloodWait errors received")
+    writer.add("nexus_flood_wait_seconds_total", outbox["flood_wait_seconds"], base, "counter",
+               "Seconds of FloodWait imposed by Telegram")
+
+    # History scans
+    history = client.history.get_stats()
+    writer.add("nexus_history_pages_total", history["pages"], base, "counter",
+               "History pages fetched")
+    writer.add("nexus_history_flood_waits_total", history["flood_waits"], base, "counter",
+               "FloodWaits hit while fetching history")
+
+    # Plugins
+    for plugin, timings in client.plugin_timings.items():
+        labels = {**base, "plugin": plugin}
+        writer.add("nexus_plugin_import_seconds", timings["import"], labels,
+                   help_text="Time spent importing the plugin module")
+        writer.add("nexus_plugin_setup_seconds", timings["setup"], labels,
+                   help_text="Time spent in the plugin's setup()")
+
+
+def collect_process(
+    writer: MetricsWriter,
+    lag_monitor=None,
+    cpu_pool=None,
+    budgets=None,
+    entities=None,
+    db=None,
+    downloads=None,
+    uploads=None,
+    message_index=None,
+    log_sink=None
+):
+    """Add process-wide metrics, including components shared by every client"""
+    try:
+        process = psutil.Process(os.getpid())
+        memory = process.memory_info()
+        cpu = process.cpu_times()
+        writer.add("process_resident_memory_bytes", memory.rss,
+                   help_text="Resident memory size in bytes")
+        writer.add("process_cpu_seconds_total", cpu.user + cpu.system, kind="counter",
+                   help_text="Total user and system CPU time in seconds")
+    except psutil.Error as e:
+        logger.debug(f"Could not read process metrics: {e}")
+
+    if lag_monitor is not None:
+        lag = lag_monitor.get_stats()
+        writer.add("nexus_event_loop_lag_seconds", lag["lag"],
+                   help_text="Most recent event loop lag sample")
+        writer.add("nexus_event_loop_lag_max_seconds", lag["max_lag"],
+                   help_text="Worst event loop lag in the last minute")
+
+    if cpu_pool is not None:
+        pool = cpu_pool.get_stats()
+        writer.add("nexus_cpu_pool_workers", pool["workers"],
+                   help_text="Worker processes in the CPU pool")
+        writer.add("nexus_cpu_tasks_total", pool["completed"], {"result": "ok"}, kind="counter",
+                   help_text="CPU pool tasks by result")
+        writer.add("nexus_cpu_tasks_total", pool["failed"], {"result": "error"}, kind="counter")
+        writer.add("nexus_cpu_tasks_total", pool["timeouts"], {"result": "timeout"}, kind="counter")
+        writer.add("nexus_cpu_pool_recycled_total", pool["recycled"], kind="counter",
+                   help_text="Times the CPU pool was restarted after a stuck or crashed worker")
+        writer.add("nexus_cpu_tasks_retried_total", pool["retried"], kind="counter",
+                   help_text="CPU tasks rerun after another task's timeout recycled the pool")
+
+    if entities is not None:
+        cache = entities.get_stats()
+        writer.add("nexus_entity_cache_size", cache["size"],
+                   help_text="Users/chats held in the entity cache")
+        writer.add("nexus_entity_cache_hits_total", cache["hits"], kind="counter",
+                   help_text="Entity lookups answered from memory")
+        writer.add("nexus_entity_cache_misses_total", cache["misses"], kind="counter",
+                   help_text="Entity lookups that needed an RPC")
+        writer.add("nexus_entity_cache_coalesced_total", cache["coalesced"], kind="counter",
+                   help_text="Entity lookups that joined an in-flight RPC")
+
+    if db is not None:
+        storage = db.get_stats()
+        writer.add("nexus_db_pending_writes", storage["pending"], {"backend": storage["backend"]},
+                   help_text="Buffered writes not yet committed")
+        writer.add("nexus_db_writes_total", storage["writes"], kind="counter",
+                   help_text="Writes accepted by client.db")
+        writer.add("nexus_db_flushes_total", storage["flushes"], kind="counter",
+                   help_text="Write batches committed by client.db")
+
+    if downloads is not None:
+        fetched = downloads.get_stats()
+        writer.add("nexus_downloads_total", fetched["downloads"], kind="counter",
+                   help_text="Media files downloaded")
+        writer.add("nexus_downloads_deduplicated_total", fetched["deduplicated"], kind="counter",
+                   help_text="Download requests answered from disk or an in-flight download")
+        writer.add("nexus_download_bytes_total", fetched["bytes"], kind="counter",
+                   help_text="Bytes of media downloaded")
+        files = downloads.cache.get_stats()
+        writer.add("nexus_download_cache_bytes", files["bytes"],
+                   help_text="Bytes held in the download cache")
+        writer.add("nexus_download_cache_files", files["files"],
+                   help_text="Files held in the download cache")
+        writer.add("nexus_download_cache_evictions_total", files["evictions"], kind="counter",
+                   help_text="Files deleted to keep the download cache within budget")
+
+    if uploads is not None:
+        sent = uploads.get_stats()
+        writer.add("nexus_uploads_total", sent["uploads"], kind="counter",
+                   help_text="Files uploaded")
+        writer.add("nexus_uploads_deduplicated_total", sent["deduplicated"], kind="counter",
+                   help_text="Sends that reused an earlier upload of the same content")
+        writer.add("nexus_upload_bytes_total", sent["bytes"], kind="counter",
+                   help_text="Bytes of file parts uploaded")
+
+    if message_index is not None:
+        index = message_index.get_stats()
+        writer.add("nexus_message_index_rows_total", index["indexed"], kind="counter",
+                   help_text="Messages written to the local search index")
+        writer.add("nexus_message_index_pending", index["pending"],
+                   help_text="Messages waiting to be written to the search index")
+        writer.add("nexus_message_index_searches_total", index["searches"], kind="counter",
+                   help_text="Local message searches")
+
+    if log_sink is not None:
+        sink = log_sink.get_stats()
+        writer.add("nexus_log_events_total", sink["events"], kind="counter",
+                   help_text="Events sent to the log sink")
+        writer.add("nexus_log_events_dropped_total", sink["dropped"], kind="counter",
+                   help_text="Log events kept local because the sink buffer was full")
+
+    if budgets is not None:
+        for row in budgets.report():
+            labels = {"plugin": row["plugin"]}
+            writer.add("nexus_plugin_cpu_seconds_total", row["cpu"], labels, "counter",
+                       "CPU time spent in plugin handlers and tasks")
+            writer.add("nexus_plugin_api_calls_total", row["api_calls"], labels, "counter",
+                       "API calls made by plugins")
+            writer.add("nexus_plugin_sent_bytes_total", row["bytes_sent"], labels, "counter",
+                       "Request bytes sent by plugins")
+            writer.add("nexus_plugin_tasks_total", row["tasks"], labels, "counter",
+                       "Tasks spawned by plugins")
+            writer.add("nexus_plugin_live_tasks", row["live_tasks"], labels,
+                       help_text="Plugin tasks currently running")
+            writer.add("nexus_plugin_throttled_total", row["throttled"], labels, "counter",
+                       "Plugin calls or invocations delayed or skipped by budgets")
+            writer.add("nexus_plugin_disabled", 1 if row["disabled"] else 0, labels,
+                       help_text="1 while a plugin is disabled")
@@ -0,0 +1,62 @@
+"""
+Runtime monitoring for Nexus v2.0
+Event loop lag measurement for health checks
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes up a sleeping task
+
+    Every `interval` seconds a task asks to be woken after `interval`
+    seconds; anything beyond that is time the loop spent busy elsewhere.
+    """
+
+    def __init__(self, interval: float = 0.5, window: float = 60.0):
+        self.interval = interval
+        self.lag = 0.0
+        self._samples = deque(maxlen=max(1, int(window / interval)))
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def max_lag(self) -> float:
+        """Worst lag seen within the window"""
+        return max(self._samples, default=0.0)
+
+    def start(self):
+        """Start sampling"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self):
+        """Stop sampling"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - started - self.interval)
+            self._samples.append(self.lag)
+            if self.lag > 1.0:
+                logger.warning(f"🐢 Event loop lag {self.lag * 1000:.0f}ms")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of lag metrics (seconds)"""
+        return {
+            "lag": self.lag,
+            "max_lag": self.max_lag,
+        }
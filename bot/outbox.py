@@ -0,0 +1,239 @@
+"""
+Outbound message queue for Nexus v2.0
+FloodWait-aware sending with global and per-chat token buckets
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Awaitable, Callable, Deque, Hashable, List
+
+from pyrogram.errors import FloodWait
+
+from .instrument import current_invocation
+from .plugins import current_plugin
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Seconds between sweeps of idle chat lanes
+SWEEP_INTERVAL = 60.0
+
+
+class _Send:
+    """One pending API call and everyone waiting on its result"""
+
+    __slots__ = ("call", "merge_key", "futures", "plugin")
+
+    def __init__(self, call, merge_key, future, plugin):
+        self.call = call
+        self.merge_key = merge_key
+        self.futures: List[asyncio.Future] = [future]
+        # Plugin that queued the call, so the send is charged to it
+        self.plugin = plugin
+
+    def resolve(self, result=None, error: Optional[BaseException] = None):
+        for future in self.futures:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+class _Lane:
+    """Per-chat send queue with its own bucket and FloodWait state"""
+
+    __slots__ = ("queue", "bucket", "parked_until", "task")
+
+    def __init__(self, bucket: TokenBucket):
+        self.queue: Deque[_Send] = deque()
+        self.bucket = bucket
+        self.parked_until = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+
+class OutboundQueue:
+    """Pace outgoing API calls per chat and globally
+
+    Each chat has a lane drained by its own task. A call must take a token
+    from the chat bucket and from the global bucket before it runs. When
+    Telegram answers with FloodWait only that chat's lane is parked for the
+    server-provided delay and the call is retried; other chats keep
+    sending. Consecutive calls with the same merge key (e.g. edits of one
+    message) collapse into the most recent one.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = 25.0,
+        burst: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: float = 3.0,
+        max_retries: int = 3
+    ):
+        self.name = name
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate, burst)
+        self._lanes: Dict[Hashable, _Lane] = {}
+        # Running totals so depth and stats never walk the lanes
+        self._queued = 0
+        self._parked = 0
+        self._next_sweep = time.monotonic() + SWEEP_INTERVAL
+
+        # Metrics
+        self.sent = 0
+        self.failed = 0
+        self.merged = 0
+        self.flood_waits = 0
+        self.flood_wait_seconds = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Calls queued across all chats"""
+        return self._queued
+
+    async def submit(
+        self,
+        chat_id: Hashable,
+        call: Callable[[], Awaitable[Any]],
+        merge_key: Optional[Hashable] = None
+    ):
+        """Queue `call` for `chat_id` and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            lane = self._lanes[chat_id] = _Lane(TokenBucket(self.chat_rate, self.chat_burst))
+
+        tail = lane.queue[-1] if lane.queue else None
+        if merge_key is not None and tail is not None and tail.merge_key == merge_key:
+            # Only the latest state matters - replace the queued call
+            tail.call = call
+            tail.plugin = current_plugin.get()
+            tail.futures.append(future)
+            self.merged += 1
+        else:
+            lane.queue.append(_Send(call, merge_key, future, current_plugin.get()))
+            self._queued += 1
+
+        if lane.task is None:
+            # Lanes outlive the caller, so don't let them inherit its context
+            lane.task = asyncio.create_task(self._drain(chat_id, lane), context=contextvars.Context())
+
+        # Waiting on the outbox counts as time spent on Telegram for handlers
+        stats = current_invocation.get()
+        if stats is None:
+            return await future
+        started = time.perf_counter()
+        try:
+            return await future
+        finally:
+            stats.add_rpc(time.perf_counter() - started)
+
+    async def _drain(self, chat_id: Hashable, lane: _Lane):
+        """Send everything queued for one chat, in order"""
+        try:
+            while lane.queue:
+                item = lane.queue.popleft()
+                self._queued -= 1
+                await self._send(chat_id, lane, item)
+        finally:
+            lane.task = None
+
+    def _sweep(self, now: float):
+        """Forget lanes with nothing queued whose bucket has refilled"""
+        self._next_sweep = now + SWEEP_INTERVAL
+        # A lane is kept while its bucket recovers so bursts stay bounded
+        idle = [
+            chat_id for chat_id, lane in self._lanes.items()
+            if lane.task is None and not lane.queue and lane.parked_until <= now and lane.bucket.is_full
+        ]
+        for chat_id in idle:
+            del self._lanes[chat_id]
+
+    async def _send(self, chat_id: Hashable, lane: _Lane, item: _Send):
+        """Run one call, retrying after FloodWait"""
+        attempt = 0
+        while True:
+            await lane.bucket.acquire()
+            await self.bucket.acquire()
+            token = current_plugin.set(item.plugin)
+            try:
+                result = await item.call()
+            except FloodWait as e:
+                wait = float(e.value or 1)
+                attempt += 1
+                self.flood_waits += 1
+                self.flood_wait_seconds += wait
+
+                if attempt > self.max_retries:
+                    self.failed += 1
+                    item.resolve(error=e)
+                    return
+
+                logger.warning(f"⏳ FloodWait {wait:.0f}s for chat {chat_id}, parking lane (attempt {attempt})")
+                lane.parked_until = time.monotonic() + wait
+                self._parked += 1
+                try:
+                    await asyncio.sleep(wait)
+                finally:
+                    self._parked -= 1
+                    lane.parked_until = 0.0
+                continue
+            except asyncio.CancelledError:
+                for future in item.futures:
+                    future.cancel()
+                raise
+            except Exception as e:
+                self.failed += 1
+                item.resolve(error=e)
+                return
+            finally:
+                current_plugin.reset(token)
+
+            self.sent += 1
+            item.resolve(result)
+            return
+
+    async def stop(self, timeout: float = 5.0):
+        """Give queued sends `timeout` seconds to finish, then cancel them"""
+        tasks = [lane.task for lane in self._lanes.values() if lane.task]
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        for lane in self._lanes.values():
+            while lane.queue:
+                lane.queue.popleft().resolve(error=ConnectionError("Client stopped before the message was sent"))
+        self._lanes.clear()
+        self._queued = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of outbound metrics"""
+        return {
+            "queued": self.depth,
+            "chats": len(self._lanes),
+            "parked_chats": self._parked,
+            "sent": self.sent,
+            "failed": self.failed,
+            "merged": self.merged,
+            "flood_waits": self.flood_waits,
+            "flood_wait_seconds": self.flood_wait_seconds,
+        }
@@ -0,0 +1,135 @@
+"""
+Permissions for Nexus v2.0
+Precomputed role index (owner, sudo, per-plugin/command grants) with runtime edits
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import logging
+from typing import Optional, Dict, Any, FrozenSet, Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+# Role bits
+ROLE_OWNER = 1
+ROLE_SUDO = 2
+ROLE_ELEVATED = ROLE_OWNER | ROLE_SUDO
+
+
+class PermissionIndex:
+    """Immutable snapshot checked on the hot path
+
+    roles maps user id -> role bitmask; grants maps a plugin or command
+    name -> frozenset of user ids allowed to run it.
+    """
+
+    __slots__ = ("roles", "grants")
+
+    def __init__(self, roles: Dict[int, int], grants: Dict[str, FrozenSet[int]]):
+        self.roles = roles
+        self.grants = grants
+
+
+class Permissions:
+    """Owner, sudo and per-plugin grants for one account
+
+    Every lookup is a dict access on the current PermissionIndex. Edits
+    change the source sets, persist them to client.db and then build a new
+    index that replaces the old one in a single assignment, so concurrent
+    checks never see a half-applied change. Sudo users from SUDO_USERS are
+    fixed; runtime grants are stored per account.
+    """
+
+    def __init__(self, client, sudo_users: Iterable[int] = ()):
+        self.client = client
+        self.owner_id: Optional[int] = None
+        self.config_sudo: FrozenSet[int] = frozenset(sudo_users)
+        self.sudo: Set[int] = set()
+        self.grants: Dict[str, Set[int]] = {}
+        self._index = PermissionIndex({}, {})
+        self.rebuild()
+
+        # Metrics
+        self.denied = 0
+
+    @property
+    def _namespace(self) -> str:
+        return f"permissions:{self.client.name}"
+
+    def rebuild(self):
+        """Recompile the index from the source sets"""
+        roles: Dict[int, int] = {}
+        for user_id in self.config_sudo | self.sudo:
+            roles[user_id] = ROLE_SUDO
+        if self.owner_id is not None:
+            roles[self.owner_id] = roles.get(self.owner_id, 0) | ROLE_OWNER
+        grants = {scope: frozenset(users) for scope, users in self.grants.items() if users}
+        # Swap in one assignment so in-flight checks never see a partial index
+        self._index = PermissionIndex(roles, grants)
+
+    def set_owner(self, user_id: int):
+        if user_id != self.owner_id:
+            self.owner_id = user_id
+            self.rebuild()
+
+    async def load(self):
+        """Read runtime sudo users and grants from client.db"""
+        stored = await self.client.db.get_many(self._namespace, ["sudo", "grants"])
+        self.sudo = set(stored.get("sudo") or [])
+        self.grants = {scope: set(users) for scope, users in (stored.get("grants") or {}).items()}
+        self.rebuild()
+
+    async def _save(self):
+        await self.client.db.set_many(self._namespace, {
+            "sudo": sorted(self.sudo),
+            "grants": {scope: sorted(users) for scope, users in self.grants.items() if users},
+        })
+
+    async def grant(self, user_id: int, scope: Optional[str] = None):
+        """Make a user sudo (scope None) or allow them one plugin/command"""
+        if scope is None:
+            self.sudo.add(user_id)
+        else:
+            self.grants.setdefault(scope.lower(), set()).add(user_id)
+        self.rebuild()
+        await self._save()
+
+    async def revoke(self, user_id: int, scope: Optional[str] = None):
+        """Undo a runtime grant (SUDO_USERS from the environment stay sudo)"""
+        if scope is None:
+            self.sudo.discard(user_id)
+        else:
+            self.grants.get(scope.lower(), set()).discard(user_id)
+        self.rebuild()
+        await self._save()
+
+    def is_owner(self, user_id: Optional[int]) -> bool:
+        return bool(self._index.roles.get(user_id, 0) & ROLE_OWNER)
+
+    def is_sudo(self, user_id: Optional[int]) -> bool:
+        """Owner or sudo user"""
+        return bool(self._index.roles.get(user_id, 0) & ROLE_ELEVATED)
+
+    def can_run(self, user_id: Optional[int], entry: Dict[str, Any]) -> bool:
+        """Whether a user may run a command entry (sudo, or granted its plugin or name)"""
+        index = self._index
+        if index.roles.get(user_id, 0) & ROLE_ELEVATED:
+            return True
+        plugin = entry.get("plugin")
+        if (
+            (plugin is not None and user_id in index.grants.get(plugin.lower(), ()))
+            or user_id in index.grants.get(entry["name"].lower(), ())
+        ):
+            return True
+        self.denied += 1
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of the permission index"""
+        return {
+            "sudo": sum(1 for roles in self._index.roles.values() if roles & ROLE_SUDO),
+            "grants": sum(len(users) for users in self._index.grants.values()),
+            "scopes": len(self._index.grants),
+            "denied": self.denied,
+        }
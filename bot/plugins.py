@@ -0,0 +1,291 @@
+"""
+Plugin helpers for Nexus v2.0
+Plugin manifests, dependency ordering, load attribution and change watching
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import ast
+import asyncio
+import importlib
+import json
+import logging
+import os
+import sys
+import tempfile
+from contextvars import ContextVar
+from pathlib import Path
+from types import ModuleType
+from typing import Optional, Dict, Any, List, Set, Tuple, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+# Name of the plugin whose code is currently running (set while a plugin is
+# imported/set up, and inherited by any task it spawns)
+current_plugin: ContextVar[Optional[str]] = ContextVar("current_plugin", default=None)
+
+# A plugin declares its manifest as a module-level literal, e.g.
+#     __plugin__ = {
+#         "name": "weather",
+#         "version": "1.2.0",
+#         "dependencies": ["http"],
+#         "commands": ["weather", "forecast"],
+#         "lazy": True,
+#     }
+# The older single fields are still read:
+#     __lazy__ = True
+#     __commands__ = ["weather", "forecast"]
+META_FIELDS = {
+    "__lazy__": "lazy",
+    "__commands__": "commands",
+}
+MANIFEST_FIELDS = ("name", "version", "dependencies", "commands", "lazy")
+
+# Bump when the manifest format changes so cached indexes are re-parsed
+MANIFEST_CACHE_VERSION = 2
+
+
+def read_plugin_meta(path: Path) -> Dict[str, Any]:
+    """Read a plugin's manifest from the source without importing it"""
+    meta: Dict[str, Any] = {"name": path.stem, "version": "", "dependencies": [], "commands": [], "lazy": False}
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    except (OSError, SyntaxError) as e:
+        logger.warning(f"Could not parse plugin {path.name}: {e}")
+        return meta
+
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or len(node.targets) != 1:
+            continue
+        target = node.targets[0]
+        if not isinstance(target, ast.Name) or (target.id not in META_FIELDS and target.id != "__plugin__"):
+            continue
+        try:
+            value = ast.literal_eval(node.value)
+        except (ValueError, TypeError):
+            logger.warning(f"Plugin {path.name}: {target.id} must be a literal")
+            continue
+        if target.id != "__plugin__":
+            meta[META_FIELDS[target.id]] = value
+        elif isinstance(value, dict):
+            meta.update({key: value[key] for key in MANIFEST_FIELDS if key in value})
+        else:
+            logger.warning(f"Plugin {path.name}: __plugin__ must be a dict")
+
+    meta["name"] = str(meta["name"] or path.stem)
+    meta["version"] = str(meta["version"])
+    meta["lazy"] = bool(meta["lazy"])
+    for field in ("commands", "dependencies"):
+        value = meta[field]
+        # A bare string would otherwise become one entry per character
+        if isinstance(value, (list, tuple)) and all(isinstance(item, str) for item in value):
+            meta[field] = list(value)
+        else:
+            logger.warning(f"Plugin {path.name}: {field} must be a list of strings, ignoring it")
+            meta[field] = []
+    return meta
+
+
+def load_manifests(plugins_dir: Path, cache_path: Path) -> Dict[str, Dict[str, Any]]:
+    """Manifests of every plugin in a directory, keyed by module name
+
+    Parsed manifests are cached in `cache_path` with each file's mtime and
+    size; only new or changed files are read and parsed again.
+    """
+    try:
+        cached = json.loads(cache_path.read_text())
+        entries = cached["plugins"] if cached.get("version") == MANIFEST_CACHE_VERSION else {}
+    except (OSError, ValueError, KeyError, AttributeError):
+        entries = {}
+
+    manifests: Dict[str, Dict[str, Any]] = {}
+    index: Dict[str, Dict[str, Any]] = {}
+    parsed = 0
+    for path in sorted(plugins_dir.glob("*.py")):
+        if path.name.startswith("__"):
+            continue
+        stat = path.stat()
+        signature = [stat.st_mtime_ns, stat.st_size]
+        entry = entries.get(path.stem)
+        if entry is not None and entry.get("signature") == signature:
+            meta = entry["meta"]
+        else:
+            meta = read_plugin_meta(path)
+            parsed += 1
+        manifests[path.stem] = meta
+        index[path.stem] = {"signature": signature, "meta": meta}
+
+    if parsed or set(index) != set(entries):
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=cache_path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": MANIFEST_CACHE_VERSION, "plugins": index}, f)
+            os.replace(tmp_name, cache_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+    logger.debug(f"Plugin manifests: {len(manifests)} total, {parsed} parsed")
+    return manifests
+
+
+def resolve_dependencies(manifests: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, Set[str]], Dict[str, str]]:
+    """Map each plugin to the plugins it depends on
+
+    Dependencies may name a plugin by module name or manifest name. Returns
+    (dependencies, skipped); plugins with a missing dependency, a
+    dependency cycle, or a skipped dependency are left out of the first
+    and listed with the reason in the second.
+    """
+    names = {meta["name"]: plugin for plugin, meta in manifests.items()}
+    names.update({plugin: plugin for plugin in manifests})
+
+    dependencies: Dict[str, Set[str]] = {}
+    skipped: Dict[str, str] = {}
+    for plugin, meta in manifests.items():
+        missing = [dep for dep in meta["dependencies"] if dep not in names]
+        if missing:
+            skipped[plugin] = f"missing dependency {', '.join(missing)}"
+        else:
+            dependencies[plugin] = {names[dep] for dep in meta["dependencies"]} - {plugin}
+
+    _, cyclic = plugin_waves(dependencies)
+    for plugin in cyclic:
+        skipped[plugin] = "dependency cycle"
+
+    # Anything that needs a skipped plugin cannot load either
+    changed = True
+    while changed:
+        changed = False
+        for plugin, required in dependencies.items():
+            if plugin in skipped:
+                continue
+            unavailable = sorted(dep for dep in required if dep in skipped)
+            if unavailable:
+                skipped[plugin] = f"dependency {', '.join(unavailable)} unavailable"
+                changed = True
+
+    return {plugin: deps for plugin, deps in dependencies.items() if plugin not in skipped}, skipped
+
+
+def plugin_waves(dependencies: Dict[str, Set[str]]) -> Tuple[List[List[str]], List[str]]:
+    """Topological waves: plugins in a wave depend only on earlier waves
+
+    Returns (waves, cyclic) where cyclic lists the plugins that are on, or
+    depend on, a dependency cycle. Dependencies outside the mapping are
+    treated as already satisfied.
+    """
+    remaining = {plugin: set(deps) & dependencies.keys() for plugin, deps in dependencies.items()}
+    waves: List[List[str]] = []
+    while remaining:
+        wave = sorted(plugin for plugin, deps in remaining.items() if not deps)
+        if not wave:
+            break
+        waves.append(wave)
+        for plugin in wave:
+            del remaining[plugin]
+        for deps in remaining.values():
+            deps.difference_update(wave)
+    return waves, sorted(remaining)
+
+
+def import_fresh(plugin_name: str) -> ModuleType:
+    """Import a new copy of a plugin module
+
+    The previous module object is left untouched (code still running from it
+    keeps working) and is put back into sys.modules if the import fails.
+    """
+    module_name = f"plugins.{plugin_name}"
+    old = sys.modules.pop(module_name, None)
+    importlib.invalidate_caches()
+    token = current_plugin.set(plugin_name)
+    try:
+        return importlib.import_module(module_name)
+    except BaseException:
+        sys.modules.pop(module_name, None)
+        if old is not None:
+            sys.modules[module_name] = old
+        raise
+    finally:
+        current_plugin.reset(token)
+
+
+class PluginWatcher:
+    """Poll the plugin directory and report changed files (development mode)
+
+    Every `interval` seconds the (mtime, size) of each plugin file is
+    compared with the last scan. A change is reported only once the file
+    has been stable for a full interval, so editors that save in several
+    writes do not trigger a reload of a half-written file.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        callback: Callable[[str, bool], Awaitable[Any]],
+        interval: float = 1.0
+    ):
+        self.directory = Path(directory)
+        self.callback = callback
+        self.interval = interval
+        self._known: Dict[str, Tuple[int, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.reloads = 0
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        try:
+            entries = os.scandir(self.directory)
+        except FileNotFoundError:
+            return snapshot
+        with entries:
+            for entry in entries:
+                if entry.name.endswith(".py") and not entry.name.startswith("__") and entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.name[:-3]] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._known = await asyncio.to_thread(self._scan)
+        self._task = asyncio.create_task(self._watch())
+        logger.info(f"👀 Watching {self.directory} for plugin changes")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _watch(self):
+        pending: Dict[str, Tuple[int, int]] = {}
+        while True:
+            await asyncio.sleep(self.interval)
+            snapshot = await asyncio.to_thread(self._scan)
+
+            changed = {name: sig for name, sig in snapshot.items() if self._known.get(name) != sig}
+            ready = [name for name, sig in changed.items() if pending.get(name) == sig]
+            pending = {name: sig for name, sig in changed.items() if name not in ready}
+            removed = [name for name in self._known if name not in snapshot]
+
+            for name in ready:
+                self._known[name] = snapshot[name]
+            for name in removed:
+                del self._known[name]
+
+            for name in sorted(ready):
+                await self._report(name, False)
+            for name in removed:
+                await self._report(name, True)
+
+    async def _report(self, plugin_name: str, removed: bool):
+        self.reloads += 1
+        try:
+            await self.callback(plugin_name, removed)
+        except Exception as e:
+            logger.error(f"❌ Reloading plugin {plugin_name} failed: {e}")
@@ -0,0 +1,222 @@
+"""
+PM permit for Nexus v2.0
+Private-message gatekeeper with in-memory approvals and decaying warnings
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import logging
+import time
+from typing import Optional, Dict, Any, Set, Tuple
+
+from pyrogram.enums import ChatType
+from pyrogram.types import Message
+
+from .ratelimit import TokenBucket
+from .scheduler import PRIORITY_LOW
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARNING = (
+    "👋 Hi! My owner hasn't approved private messages from you yet.\n"
+    "Please wait for a reply - repeated messages will get you blocked."
+)
+
+
+class PMPermit:
+    """Gate for private messages to a userbot account
+
+    Approved and blocked users are kept in sets, so a message from a known
+    user costs one membership test. Unknown senders accumulate warnings
+    that decay by one every `decay` seconds; past `limit` they are
+    blocked. Each sender gets at most one warning reply per `decay`
+    seconds and all replies share a global rate limit, so a wave of new
+    DMs cannot turn into a wave of outgoing messages. Approvals and blocks
+    are applied to the sets and client.db's write buffer right away (the
+    buffer commits them in batches); only the Telegram block and unblock
+    calls are scheduled.
+    """
+
+    def __init__(self, client, limit: int = 3, decay: float = 600, reply_rate: float = 0.5, log: bool = True):
+        self.client = client
+        self.limit = limit
+        self.decay = decay
+        self.log = log
+        self.message = DEFAULT_WARNING
+        self.approved: Set[int] = set()
+        self.blocked: Set[int] = set()
+        # user_id -> (warnings, last update, last reply)
+        self._warnings: Dict[int, Tuple[float, float, float]] = {}
+        self._replies = TokenBucket(reply_rate, max(1.0, reply_rate * 10))
+        self._next_sweep = time.monotonic() + decay
+
+        # Metrics
+        self.checked = 0
+        self.warned = 0
+        self.blocks = 0
+
+    @property
+    def _namespace(self) -> str:
+        return f"pm_permit:{self.client.name}"
+
+    async def load(self):
+        """Read approvals and blocks from client.db"""
+        entries = await self.client.db.items(self._namespace)
+        self.approved = {int(user_id) for user_id, state in entries.items() if state == "approved"}
+        self.blocked = {int(user_id) for user_id, state in entries.items() if state == "blocked"}
+        logger.info(f"🛡️ PM permit loaded ({len(self.approved)} approved, {len(self.blocked)} blocked)")
+
+    async def approve(self, user_id: int):
+        if self._approve(user_id):
+            self._sync_block(user_id, False)
+
+    async def disapprove(self, user_id: int):
+        self.approved.discard(user_id)
+        await self.client.db.delete(self._namespace, user_id)
+
+    def _approve(self, user_id: int) -> bool:
+        """Record an approval; True if the user had been blocked"""
+        self.approved.add(user_id)
+        self._warnings.pop(user_id, None)
+        self.client.db.set_nowait(self._namespace, user_id, "approved")
+        if user_id not in self.blocked:
+            return False
+        self.blocked.discard(user_id)
+        return True
+
+    def _exempt(self, message: Message) -> bool:
+        user = message.from_user
+        return (
+            user is None
+            or user.is_self
+            or user.is_bot
+            or user.is_verified
+            or user.is_support
+            or user.is_contact
+            or self.client.is_sudo(user.id)
+        )
+
+    def admits(self, message: Message) -> bool:
+        """Whether check() would let a message through, without counting it"""
+        if message.chat is None or message.chat.type != ChatType.PRIVATE or message.outgoing:
+            return True
+        chat_id = message.chat.id
+        if chat_id in self.approved:
+            return True
+        return chat_id not in self.blocked and self._exempt(message)
+
+    def check(self, message: Message) -> bool:
+        """Router hook for private messages; False if the message is stopped
+
+        Runs synchronously on every private message, so Telegram calls
+        are handed to the scheduler.
+        """
+        if message.chat is None or message.chat.type != ChatType.PRIVATE:
+            return True
+        self.checked += 1
+        chat_id = message.chat.id
+
+        if message.outgoing:
+            # Writing to someone first approves them
+            if chat_id not in self.approved and chat_id != getattr(self.client.me, "id", None):
+                if self._approve(chat_id):
+                    self._sync_block(chat_id, False)
+            return True
+
+        if chat_id in self.approved:
+            return True
+        if chat_id in self.blocked:
+            return False
+        if self._exempt(message):
+            return True
+
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        warnings, updated, replied = self._warnings.get(chat_id, (0.0, now, 0.0))
+        warnings = max(0.0, warnings - (now - updated) / self.decay) + 1
+        self._warnings[chat_id] = (warnings, now, replied)
+
+        if warnings > self.limit:
+            self.blocked.add(chat_id)
+            self._warnings.pop(chat_id, None)
+            self.blocks += 1
+            self._log(message, blocked=True)
+            self.client.db.set_nowait(self._namespace, chat_id, "blocked")
+            if not self._sync_block(chat_id, True):
+                logger.warning(f"Update queue full, {chat_id} is only blocked locally")
+            return False
+
+        self._log(message)
+        if now - replied >= self.decay and self._replies.try_acquire():
+            self._warnings[chat_id] = (warnings, now, now)
+            self.warned += 1
+            self.client.scheduler.submit(chat_id, self._warn, message, warnings, priority=PRIORITY_LOW)
+        return False
+
+    def _sweep(self, now: float):
+        """Forget senders whose warnings have fully decayed"""
+        self._next_sweep = now + self.decay
+        expired = [
+            user_id for user_id, (warnings, updated, _) in self._warnings.items()
+            if now - updated >= warnings * self.decay
+        ]
+        for user_id in expired:
+            del self._warnings[user_id]
+
+    async def _warn(self, message: Message, warnings: float):
+        await self.client.send_message(
+            message.chat.id,
+            f"{self.message}\n\n⚠️ Warning {int(warnings)}/{self.limit}"
+        )
+
+    def _sync_block(self, user_id: int, blocked: bool) -> bool:
+        """Queue the Telegram block/unblock for a user; False if it was shed
+
+        Runs on the user's lane at normal priority, so it is not shed during
+        the spam wave it answers, and a still-queued call for the same user
+        is replaced - only the latest state reaches Telegram.
+        """
+        return self.client.scheduler.submit(
+            user_id,
+            self._block if blocked else self._unblock,
+            user_id,
+            coalesce_key=("pm_block", user_id)
+        )
+
+    async def _block(self, user_id: int):
+        try:
+            await self.client.block_user(user_id)
+        except Exception as e:
+            logger.warning(f"Could not block {user_id}: {e}")
+
+    async def _unblock(self, user_id: int):
+        try:
+            await self.client.unblock_user(user_id)
+        except Exception as e:
+            logger.warning(f"Could not unblock {user_id}: {e}")
+
+    def _log(self, message: Message, blocked: bool = False):
+        """Hand the PM to the batched log sink (repeats collapse into a counter)"""
+        if not self.log:
+            return
+        user = message.from_user
+        name = user.first_name if user else "Unknown"
+        text = (message.text or message.caption or "<media>")[:500]
+        header = "⛔ **Blocked PM**" if blocked else "📨 **PM**"
+        self.client.queue_log(
+            f"{header} from {name} (`{message.chat.id}`)\n{text}",
+            key=("pm", message.chat.id, text)
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of PM permit metrics"""
+        return {
+            "approved": len(self.approved),
+            "blocked": len(self.blocked),
+            "pending": len(self._warnings),
+            "checked": self.checked,
+            "warned": self.warned,
+            "blocks": self.blocks,
+        }
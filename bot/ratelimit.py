@@ -0,0 +1,69 @@
+"""
+Rate limiting primitives for Nexus v2.0
+Token buckets shared by the outbound queue and other throttled paths
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` tokens per second"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def try_acquire(self, amount: float = 1.0) -> bool:
+        """Take `amount` tokens if available right now"""
+        self._refill(time.monotonic())
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def delay(self, amount: float = 1.0) -> float:
+        """Seconds until `amount` tokens (capped at capacity) are available"""
+        self._refill(time.monotonic())
+        needed = min(amount, self.capacity) - self.tokens
+        if needed <= 0:
+            return 0.0
+        return needed / self.rate if self.rate > 0 else float("inf")
+
+    def charge(self, amount: float):
+        """Take `amount` tokens after the fact, going into debt if needed"""
+        self._refill(time.monotonic())
+        self.tokens -= amount
+
+    @property
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until `amount` tokens can be taken
+
+        Requests larger than the capacity are admitted once the bucket is
+        full and leave it in debt, so big payloads are paced rather than
+        rejected.
+        """
+        while True:
+            wait = self.delay(amount)
+            if wait <= 0:
+                self.tokens -= amount
+                return
+            await asyncio.sleep(wait)
@@ -0,0 +1,194 @@
+"""
+Command router for Nexus v2.0
+Single message handler that dispatches prefixed commands in O(1)
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+from pyrogram import StopPropagation
+from pyrogram.handlers import EditedMessageHandler, MessageHandler
+from pyrogram.types import Message
+
+from .instrument import InvocationStats, current_invocation, coroutine_stack, measure
+from .plugins import current_plugin
+from .scheduler import PRIORITY_HIGH
+
+logger = logging.getLogger(__name__)
+
+# Handler group used by the router. Negative groups run before the default
+# group 0, so plugin handlers registered with Pyrogram still see the update.
+ROUTER_GROUP = -1
+
+
+class CommandRouter:
+    """Route prefixed messages to handlers registered via add_command"""
+
+    def __init__(self, client):
+        self.client = client
+        self.prefix = client.command_prefix
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._handler = MessageHandler(self._on_message)
+        self._edit_handler = EditedMessageHandler(self._on_edit)
+
+    def rebuild(self):
+        """Recompile the lookup table from client.commands"""
+        index = {}
+        for name, entry in self.client.commands.items():
+            index[name.lower()] = entry
+        # Aliases never shadow a real command name
+        for entry in self.client.commands.values():
+            for alias in entry.get("aliases", ()):
+                index.setdefault(alias.lower(), entry)
+        # Swap in one assignment so in-flight lookups never see a partial table
+        self._index = index
+
+    def attach(self):
+        """Register the router with Pyrogram (called on every start)"""
+        self.client.add_handler(self._handler, group=ROUTER_GROUP)
+        self.client.add_handler(self._edit_handler, group=ROUTER_GROUP)
+
+    def detach(self):
+        """Remove the router from Pyrogram's dispatcher"""
+        for handler in (self._handler, self._edit_handler):
+            try:
+                self.client.remove_handler(handler, group=ROUTER_GROUP)
+            except Exception as e:
+                logger.debug(f"Router was not attached: {e}")
+
+    def resolve(self, text: Optional[str]) -> Optional[Tuple[Dict[str, Any], List[str]]]:
+        """Return (entry, args) for a command message, or None"""
+        if not text or not text.startswith(self.prefix):
+            return None
+
+        parts = text[len(self.prefix):].split()
+        if not parts:
+            return None
+
+        name = parts[0].lower()
+        if "@" in name:
+            # /command@BotUsername - only accept commands addressed to us
+            name, _, target = name.partition("@")
+            me = self.client.me
+            if not me or not me.username or target != me.username.lower():
+                return None
+
+        entry = self._index.get(name)
+        if entry is None:
+            return None
+
+        parts[0] = name
+        return entry, parts
+
+    def _is_allowed(self, message: Message, entry: Dict[str, Any]) -> bool:
+        """Userbot commands are only accepted from the owner, sudo users or grantees"""
+        if self.client.is_assistant:
+            return True
+        if message.outgoing:
+            return True
+        return bool(message.from_user and self.client.permissions.can_run(message.from_user.id, entry))
+
+    async def _on_message(self, client, message: Message):
+        """Single Pyrogram entry point for all commands"""
+        client.metrics.updates_received += 1
+        antispam = client.antispam
+        user_id = message.from_user.id if message.from_user else None
+        # Ignored senders are dropped before any handler, in any group, sees the update
+        if antispam is not None and user_id is not None and antispam.is_ignored(user_id):
+            raise StopPropagation
+        # Unapproved private messages never reach plugins
+        if client.pm_permit is not None and not client.pm_permit.check(message):
+            raise StopPropagation
+
+        if client.message_index is not None:
+            client.message_index.add(client.name, message)
+        match = self.resolve(message.text or message.caption)
+        if match is None:
+            return
+
+        entry, args = match
+        # Checked before scheduling so unauthorized commands never cost a worker
+        if not self._is_allowed(message, entry):
+            return
+        # Disabled plugins and plugins over their CPU budget are skipped
+        if not client.budgets.admit(entry["plugin"]):
+            return
+
+        if antispam is not None and not message.outgoing and not client.is_sudo(user_id):
+            chat_id = message.chat.id if message.chat else None
+            if not antispam.check(user_id, chat_id):
+                raise StopPropagation
+
+        # Mirror pyrogram.filters.command so handlers can read message.command
+        message.command = args
+
+        # Hand off to the scheduler so a slow handler never blocks Pyrogram.
+        # Commands outrank plugin message handlers, which are shed first.
+        chat_id = message.chat.id if message.chat else None
+        if not client.scheduler.submit(chat_id, self._run, client, entry, message, priority=PRIORITY_HIGH):
+            logger.warning(f"Update queue full, dropped command {entry['name']} in {chat_id}")
+
+    async def _on_edit(self, client, message: Message):
+        """Keep the message index current; edits never re-run commands"""
+        if client.message_index is None:
+            return
+        user_id = message.from_user.id if message.from_user else None
+        if client.antispam is not None and user_id is not None and client.antispam.is_ignored(user_id):
+            return
+        if client.pm_permit is not None and not client.pm_permit.admits(message):
+            return
+        client.message_index.add(client.name, message)
+
+    async def _run(self, client, entry: Dict[str, Any], message: Message):
+        """Invoke a command handler with timing instrumentation"""
+        loop = asyncio.get_running_loop()
+        stats = InvocationStats()
+        coro = entry["handler"](client, message)
+        sample: List[str] = []
+        threshold = client.config.SLOW_COMMAND_THRESHOLD
+
+        # Capture where the handler is stuck at the moment it becomes slow
+        timer = loop.call_later(threshold, lambda: sample.extend(coroutine_stack(coro)))
+        token = current_invocation.set(stats)
+        # Tasks and API calls made by the handler are attributed to its plugin
+        plugin = entry["plugin"]
+        plugin_token = current_plugin.set(plugin)
+        started = time.perf_counter()
+        error = None
+        entry["active"] += 1
+        try:
+            await measure(coro, stats)
+        except Exception as e:
+            error = e
+        finally:
+            entry["active"] -= 1
+            stats.wall = time.perf_counter() - started
+            current_plugin.reset(plugin_token)
+            current_invocation.reset(token)
+            timer.cancel()
+            if plugin is not None:
+                client.budgets.charge_cpu(plugin, stats.cpu)
+            client.metrics.observe_command(
+                entry["name"], stats.wall, error is not None, rpc=stats.rpc, cpu=stats.cpu
+            )
+
+        if stats.wall >= threshold:
+            self._log_slow(entry, message, stats, sample)
+
+        if error is not None:
+            await client.handle_error(error, f"command {entry['name']}")
+
+    def _log_slow(self, entry: Dict[str, Any], message: Message, stats: InvocationStats, sample: List[str]):
+        """Report a handler that crossed SLOW_COMMAND_THRESHOLD"""
+        chat_id = message.chat.id if message.chat else None
+        stack = "\n    ".join(sample) if sample else "(finished before sampling)"
+        logger.warning(
+            f"🐢 Slow command {entry['name']} in chat {chat_id}: "
+            f"{stats.wall * 1000:.0f}ms wall, {stats.rpc * 1000:.0f}ms rpc ({stats.rpc_calls} calls), "
+            f"{stats.cpu * 1000:.0f}ms cpu\n  stack at threshold:\n    {stack}"
+        )
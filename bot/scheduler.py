@@ -0,0 +1,225 @@
+"""
+Update scheduler for Nexus v2.0
+Bounded worker pool with per-chat ordering and backpressure
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Optional, Dict, Any, Callable, Deque, Hashable, List, Set
+
+logger = logging.getLogger(__name__)
+
+# Update priorities - low priority work is shed first when the queue is full
+PRIORITY_HIGH = 0
+PRIORITY_LOW = 1
+
+
+class _Job:
+    """A queued unit of work for one chat"""
+
+    __slots__ = ("key", "fn", "args", "priority", "coalesce_key", "enqueued_at", "state")
+
+    def __init__(self, key, fn, args, priority, coalesce_key, enqueued_at):
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.priority = priority
+        self.coalesce_key = coalesce_key
+        self.enqueued_at = enqueued_at
+        self.state = "queued"
+
+
+class UpdateScheduler:
+    """Fan updates out to N workers while keeping per-chat ordering
+
+    Every chat gets its own FIFO lane. A lane is owned by at most one worker
+    at a time, so updates from one chat run in order while different chats
+    run in parallel. The total number of queued jobs is capped; once full,
+    low priority jobs are shed to make room for high priority ones. A job
+    submitted with a coalesce key replaces a still-queued job with the same
+    key on its lane (e.g. PM permit block/unblock calls for one user).
+    """
+
+    def __init__(self, name: str, workers: int = 8, max_queue: int = 1000):
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+
+        self._lanes: Dict[Hashable, Deque[_Job]] = {}
+        self._scheduled: Set[Hashable] = set()
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._low: Deque[_Job] = deque()
+        self._tasks: List[asyncio.Task] = []
+        self._depth = 0
+
+        # Metrics
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self.shed = 0
+        self.coalesced = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.last_wait = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting to run"""
+        return self._depth
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        """Spawn the worker tasks"""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"⚙️ Started {self.workers} update workers for {self.name} (queue cap {self.max_queue})")
+
+    async def stop(self, timeout: float = 5.0):
+        """Drain queued jobs for up to `timeout` seconds, then cancel workers"""
+        if not self._tasks:
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while (self._depth or self._scheduled) and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+
+        if self._depth:
+            logger.warning(f"Dropping {self._depth} queued updates for {self.name} on shutdown")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        self._lanes.clear()
+        self._scheduled.clear()
+        self._low.clear()
+        self._ready = asyncio.Queue()
+        self._depth = 0
+
+    def submit(
+        self,
+        key: Hashable,
+        fn: Callable,
+        *args,
+        priority: int = PRIORITY_HIGH,
+        coalesce_key: Optional[Hashable] = None
+    ) -> bool:
+        """Queue `fn(*args)` on the lane for `key`; returns False if shed"""
+        lane = self._lanes.get(key)
+
+        # A newer update replaces a still-queued one with the same coalesce key
+        if coalesce_key is not None and lane:
+            for job in lane:
+                if job.coalesce_key == coalesce_key:
+                    job.fn = fn
+                    job.args = args
+                    self.coalesced += 1
+                    return True
+
+        if self._depth >= self.max_queue:
+            if priority == PRIORITY_LOW or not self._evict_low():
+                self.shed += 1
+                return False
+            lane = self._lanes.get(key)
+
+        job = _Job(key, fn, args, priority, coalesce_key, asyncio.get_running_loop().time())
+        if lane is None:
+            lane = self._lanes[key] = deque()
+        lane.append(job)
+        self._depth += 1
+        self.submitted += 1
+
+        if priority == PRIORITY_LOW:
+            self._low.append(job)
+
+        if key not in self._scheduled:
+            self._scheduled.add(key)
+            self._ready.put_nowait(key)
+
+        return True
+
+    def _evict_low(self) -> bool:
+        """Drop the oldest queued low priority job to make room"""
+        while self._low:
+            job = self._low.popleft()
+            if job.state != "queued":
+                continue
+            lane = self._lanes.get(job.key)
+            if lane is not None:
+                lane.remove(job)
+            job.state = "shed"
+            self._depth -= 1
+            self.shed += 1
+            return True
+        return False
+
+    async def _worker(self):
+        """Take ownership of one ready lane at a time and run its next job"""
+        loop = asyncio.get_running_loop()
+        while True:
+            key = await self._ready.get()
+            lane = self._lanes.get(key)
+
+            if not lane:
+                # Every job on this lane was shed while it waited
+                self._lanes.pop(key, None)
+                self._scheduled.discard(key)
+                continue
+
+            job = lane.popleft()
+            job.state = "running"
+            self._depth -= 1
+
+            wait = loop.time() - job.enqueued_at
+            self.last_wait = wait
+            self.wait_total += wait
+            if wait > self.wait_max:
+                self.wait_max = wait
+
+            try:
+                await job.fn(*job.args)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"❌ Update job failed in {self.name}: {e}")
+            finally:
+                job.state = "done"
+                self.processed += 1
+
+            # Requeue at the back so a busy chat cannot starve the others
+            if lane:
+                self._ready.put_nowait(key)
+            else:
+                self._lanes.pop(key, None)
+                self._scheduled.discard(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of queue metrics"""
+        return {
+            "workers": self.workers,
+            "depth": self._depth,
+            "max_queue": self.max_queue,
+            "active_chats": len(self._scheduled),
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "failed": self.failed,
+            "shed": self.shed,
+            "coalesced": self.coalesced,
+            "wait_avg": self.wait_total / self.processed if self.processed else 0.0,
+            "wait_max": self.wait_max,
+            "wait_last": self.last_wait,
+        }
@@ -0,0 +1,236 @@
+"""
+Message index for Nexus v2.0
+Local SQLite FTS5 full-text index of messages seen by the accounts
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import asyncio
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from pyrogram.types import Message
+
+logger = logging.getLogger(__name__)
+
+# (account, chat_id, message_id, date, sender_id, text)
+Row = Tuple[str, int, int, int, Optional[int], str]
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS messages ("
+    " account TEXT NOT NULL, chat_id INTEGER NOT NULL, message_id INTEGER NOT NULL,"
+    " date INTEGER NOT NULL, sender_id INTEGER, text TEXT NOT NULL,"
+    " UNIQUE (account, chat_id, message_id))",
+    "CREATE INDEX IF NOT EXISTS idx_messages_chat_date ON messages (chat_id, date)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+    " text, content='messages', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')",
+    # External-content FTS tables are kept in sync with triggers
+    "CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN"
+    " INSERT INTO messages_fts (rowid, text) VALUES (new.rowid, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN"
+    " INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.rowid, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS messages_au AFTER UPDATE OF text ON messages BEGIN"
+    " INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.rowid, old.text);"
+    " INSERT INTO messages_fts (rowid, text) VALUES (new.rowid, new.text); END",
+)
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching all words (prefix on the last)"""
+    words = [word.replace('"', '""') for word in text.split()]
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class MessageIndex:
+    """Incrementally written FTS5 index, shared by all accounts in a process
+
+    add() only buffers a row; a background task commits buffered rows in one
+    transaction every `flush_interval` seconds or once `batch_size` rows are
+    waiting. All SQLite work runs on one dedicated thread (WAL mode), so
+    neither writes nor searches block the event loop. The router adds new
+    and edited messages; a failed commit keeps its rows for the next one.
+    """
+
+    def __init__(self, path: Path, batch_size: int = 200, flush_interval: float = 2.0):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[str, int, int], Row] = {}
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+        # Metrics
+        self.indexed = 0
+        self.searches = 0
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    async def start(self):
+        """Open the index and start the write-behind task"""
+        if self._task is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nexus-index")
+        await self._run(self._open)
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Commit buffered rows and close the index"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self.flush()
+        await self._run(self._conn.close)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def add(self, account: str, message: Message):
+        """Queue a message for indexing (no-op for messages without text)"""
+        text = message.text or message.caption
+        if not text or not message.chat:
+            return
+        key = (account, message.chat.id, message.id)
+        date = int(message.date.timestamp()) if message.date else 0
+        sender = message.from_user.id if message.from_user else (
+            message.sender_chat.id if message.sender_chat else None
+        )
+        # Later versions (edits) of a buffered message replace earlier ones
+        self._pending[key] = (account, message.chat.id, message.id, date, sender, str(text))
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Message index flush failed: {e}")
+
+    def _write(self, rows: List[Row]):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO messages (account, chat_id, message_id, date, sender_id, text)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (account, chat_id, message_id) DO UPDATE SET text = excluded.text"
+                " WHERE text != excluded.text",
+                rows
+            )
+
+    async def flush(self):
+        """Commit every buffered row now"""
+        if not self._pending or self._executor is None:
+            return
+        batch, self._pending = self._pending, {}
+        try:
+            await self._run(self._write, list(batch.values()))
+        except BaseException:
+            # Keep the rows for the next flush; newer versions buffered meanwhile win
+            batch.update(self._pending)
+            self._pending = batch
+            raise
+        self.indexed += len(batch)
+
+    async def backfill(self, client, chat_id, limit: int = 0) -> int:
+        """Index a chat's history through the history engine (resumable)"""
+        count = 0
+        async for message in client.iter_history(chat_id, limit=limit, checkpoint="index_backfill"):
+            self.add(client.name, message)
+            count += 1
+            # Flush inline so a long backfill never outruns the write buffer
+            if len(self._pending) >= self.batch_size:
+                await self.flush()
+        await self.flush()
+        return count
+
+    async def search(
+        self,
+        query: str,
+        account: Optional[str] = None,
+        chat_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 20,
+        raw: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Best matches first (bm25); pass raw=True to use FTS5 query syntax"""
+        match = query if raw else fts_query(query)
+        if not match or self._executor is None:
+            return []
+
+        clauses = ["messages_fts MATCH ?"]
+        params: List[Any] = [match]
+        if account is not None:
+            clauses.append("m.account = ?")
+            params.append(account)
+        if chat_id is not None:
+            clauses.append("m.chat_id = ?")
+            params.append(chat_id)
+        if since is not None:
+            clauses.append("m.date >= ?")
+            params.append(int(since.timestamp()))
+        if until is not None:
+            clauses.append("m.date < ?")
+            params.append(int(until.timestamp()))
+        params.append(limit)
+
+        sql = (
+            "SELECT m.account, m.chat_id, m.message_id, m.date, m.sender_id,"
+            " snippet(messages_fts, 0, '**', '**', '…', 12), bm25(messages_fts)"
+            " FROM messages_fts JOIN messages m ON m.rowid = messages_fts.rowid"
+            f" WHERE {' AND '.join(clauses)} ORDER BY bm25(messages_fts) LIMIT ?"
+        )
+
+        def run():
+            return self._conn.execute(sql, params).fetchall()
+
+        # Searches include rows still waiting in the write buffer; if they
+        # cannot be committed right now, search what already is
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"Message index flush failed, searching committed rows only: {e}")
+        rows = await self._run(run)
+        self.searches += 1
+        return [
+            {
+                "account": account_, "chat_id": chat, "message_id": message_id,
+                "date": datetime.fromtimestamp(date), "sender_id": sender,
+                "snippet": snippet, "rank": rank,
+            }
+            for account_, chat, message_id, date, sender, snippet, rank in rows
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of index metrics"""
+        return {
+            "pending": len(self._pending),
+            "indexed": self.indexed,
+            "searches": self.searches,
+        }
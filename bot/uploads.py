@@ -0,0 +1,307 @@
+"""
+Upload manager for Nexus v2.0
+Parallel part uploads with shared bandwidth limits, hashing and re-upload dedup
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import asyncio
+import hashlib
+import inspect
+import logging
+import mimetypes
+import time
+from functools import partial
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable
+
+from pyrogram import raw, types, utils
+from pyrogram.errors import FloodWait, FilePartMissing
+from pyrogram.session import Session
+
+from .plugins import current_plugin
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Telegram part size (must divide 512 KiB) and the "big file" threshold
+PART_SIZE = 512 * 1024
+BIG_FILE_SIZE = 10 * 1024 * 1024
+
+# Attempts per part before the upload fails
+PART_RETRIES = 3
+
+
+class _Progress:
+    """Throttles a progress(current, total) callback to one call per interval"""
+
+    def __init__(self, callback: Optional[Callable], total: int, interval: float):
+        self.callback = callback
+        self.total = total
+        self.interval = interval
+        self.current = 0
+        self._last = 0.0
+
+    async def advance(self, amount: int):
+        self.current += amount
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if self.current < self.total and now - self._last < self.interval:
+            return
+        self._last = now
+        result = self.callback(self.current, self.total)
+        if inspect.isawaitable(result):
+            await result
+
+
+class UploadManager:
+    """Process-wide upload scheduler
+
+    Parts of one file are read sequentially (hashing sha256 on the way) and
+    sent by several concurrent workers over a dedicated media session, as
+    Pyrogram's save_file does, so uploads never queue behind the main
+    session; a process-wide semaphore caps parts in flight and an optional
+    token bucket caps bytes per second across all uploads. Sent files are
+    remembered per account as sha256 -> file_id in client.db, with the
+    digest taken while the file streams out, and each path (with its size
+    and mtime) maps to the digest it had. Re-sending an unchanged file
+    reuses Telegram's copy without reading it; a new file is read once.
+    """
+
+    def __init__(self, concurrency: int = 4, parts: int = 4, rate: float = 0, progress_interval: float = 2.0):
+        self.parts = max(1, parts)
+        self.progress_interval = progress_interval
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._bandwidth = TokenBucket(rate, rate) if rate > 0 else None
+
+        # Metrics
+        self.uploads = 0
+        self.deduplicated = 0
+        self.failed = 0
+        self.bytes_uploaded = 0
+
+    @staticmethod
+    def _fingerprint(path: Path) -> str:
+        """Identifies unchanged files so they are not hashed again"""
+        stat = path.stat()
+        return f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    async def _cached_file_id(self, client, path: Path) -> Optional[str]:
+        digest = await client.db.get("upload_hashes", self._fingerprint(path))
+        if digest is None:
+            return None
+        # file_ids are only valid for the account that uploaded them
+        return await client.db.get("uploads", f"{client.name}:{digest}")
+
+    async def _remember(self, client, path: Path, digest: str, message):
+        media = getattr(message, "document", None) if message else None
+        if media is not None:
+            await client.db.set("upload_hashes", self._fingerprint(path), digest)
+            await client.db.set("uploads", f"{client.name}:{digest}", media.file_id)
+
+    @staticmethod
+    async def _media_session(client) -> Session:
+        """Start a media session on the account's DC for sending file parts"""
+        session = Session(
+            client, await client.storage.dc_id(), await client.storage.auth_key(),
+            await client.storage.test_mode(), is_media=True
+        )
+        await session.start()
+        return session
+
+    async def _send_part(self, client, session: Session, query):
+        """Send one part, waiting out FloodWaits and retrying transient errors"""
+        # Parts bypass client.invoke, so charge them to the plugin here
+        plugin = current_plugin.get()
+        if plugin is not None:
+            await client.budgets.charge_call(plugin, query)
+        for attempt in range(PART_RETRIES):
+            try:
+                async with self._slots:
+                    return await session.invoke(query)
+            except FloodWait as e:
+                await asyncio.sleep(e.value)
+            except (OSError, asyncio.TimeoutError) as e:
+                if attempt == PART_RETRIES - 1:
+                    raise
+                logger.debug(f"Retrying upload part {query.file_part}: {e}")
+                await asyncio.sleep(1 + attempt)
+        raise ConnectionError(f"Upload part {query.file_part} failed after {PART_RETRIES} attempts")
+
+    def _part_query(self, file_id: int, index: int, total: int, chunk: bytes, is_big: bool):
+        if is_big:
+            return raw.functions.upload.SaveBigFilePart(
+                file_id=file_id, file_part=index, file_total_parts=total, bytes=chunk
+            )
+        return raw.functions.upload.SaveFilePart(file_id=file_id, file_part=index, bytes=chunk)
+
+    async def upload(self, client, path, progress: Optional[Callable] = None):
+        """Upload a file in parallel parts; returns (InputFile/InputFileBig, sha256 hex)"""
+        path = Path(path)
+        size = path.stat().st_size
+        if size == 0:
+            raise ValueError("File size equals to 0 B")
+
+        total = (size + PART_SIZE - 1) // PART_SIZE
+        is_big = size > BIG_FILE_SIZE
+        file_id = client.rnd_id()
+        sha256 = hashlib.sha256()
+        md5 = hashlib.md5() if not is_big else None
+        tracker = _Progress(progress, size, self.progress_interval)
+        parts: asyncio.Queue = asyncio.Queue(maxsize=self.parts)
+
+        async def worker():
+            while True:
+                item = await parts.get()
+                if item is None:
+                    return
+                index, chunk = item
+                if self._bandwidth is not None:
+                    await self._bandwidth.acquire(len(chunk))
+                await self._send_part(client, session, self._part_query(file_id, index, total, chunk, is_big))
+                self.bytes_uploaded += len(chunk)
+                await tracker.advance(len(chunk))
+
+        session = await self._media_session(client)
+        workers = []
+        fp = None
+        try:
+            fp = await asyncio.to_thread(open, path, "rb")
+            workers = [asyncio.create_task(worker()) for _ in range(min(self.parts, total))]
+            for index in range(total):
+                chunk = await asyncio.to_thread(fp.read, PART_SIZE)
+                sha256.update(chunk)
+                if md5 is not None:
+                    md5.update(chunk)
+                # Bounded queue: at most `parts` chunks are held in memory
+                await self._put(parts, (index, chunk), workers)
+            for _ in workers:
+                await self._put(parts, None, workers)
+            await asyncio.gather(*workers)
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if fp is not None:
+                await asyncio.to_thread(fp.close)
+            await session.stop()
+
+        if is_big:
+            input_file = raw.types.InputFileBig(id=file_id, parts=total, name=path.name)
+        else:
+            input_file = raw.types.InputFile(
+                id=file_id, parts=total, name=path.name, md5_checksum=md5.hexdigest()
+            )
+        return input_file, sha256.hexdigest()
+
+    @staticmethod
+    async def _put(queue: asyncio.Queue, item, workers):
+        """queue.put that fails fast if a worker has already died"""
+        put = asyncio.ensure_future(queue.put(item))
+        while not put.done():
+            running = [task for task in workers if not task.done()]
+            if not running:
+                put.cancel()
+                raise ConnectionError("Upload workers stopped unexpectedly")
+            await asyncio.wait([put, *running], return_when=asyncio.FIRST_COMPLETED)
+            for task in workers:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    put.cancel()
+                    raise task.exception()
+
+    async def send_document(
+        self,
+        client,
+        chat_id,
+        path,
+        caption: str = "",
+        file_name: Optional[str] = None,
+        parse_mode=None,
+        progress: Optional[Callable] = None
+    ):
+        """Send a file as a document, reusing an earlier upload of identical content"""
+        path = Path(path)
+        cached = await self._cached_file_id(client, path)
+        if cached is not None:
+            try:
+                message = await client.outbox.submit(
+                    chat_id,
+                    partial(
+                        client.send_document, chat_id, cached,
+                        caption=caption, file_name=file_name, parse_mode=parse_mode
+                    )
+                )
+                self.deduplicated += 1
+                return message
+            except Exception as e:
+                # File references expire; fall back to a fresh upload
+                logger.debug(f"Cached upload for {path.name} not reusable: {e}")
+
+        input_file, digest = await self.upload(client, path, progress)
+        name = file_name or path.name
+        media = raw.types.InputMediaUploadedDocument(
+            mime_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+            file=input_file,
+            attributes=[raw.types.DocumentAttributeFilename(file_name=name)]
+        )
+
+        async def send():
+            for attempt in range(PART_RETRIES + 1):
+                try:
+                    return await client.invoke(
+                        raw.functions.messages.SendMedia(
+                            peer=await client.resolve_peer(chat_id),
+                            media=media,
+                            random_id=client.rnd_id(),
+                            **await utils.parse_text_entities(client, caption, parse_mode, None)
+                        )
+                    )
+                except FilePartMissing as e:
+                    # A part that keeps going missing must not hold the chat's lane forever
+                    if attempt == PART_RETRIES:
+                        raise
+                    await self._resend_part(client, path, input_file, e.value)
+
+        r = await client.outbox.submit(chat_id, send)
+        message = None
+        for update in r.updates:
+            if isinstance(update, (raw.types.UpdateNewMessage, raw.types.UpdateNewChannelMessage)):
+                message = await types.Message._parse(
+                    client, update.message,
+                    {u.id: u for u in r.users},
+                    {c.id: c for c in r.chats}
+                )
+                break
+
+        self.uploads += 1
+        await self._remember(client, path, digest, message)
+        return message
+
+    async def _resend_part(self, client, path: Path, input_file, index: int):
+        """Upload a single part Telegram reports as missing"""
+        def read():
+            with open(path, "rb") as f:
+                f.seek(index * PART_SIZE)
+                return f.read(PART_SIZE)
+
+        chunk = await asyncio.to_thread(read)
+        is_big = isinstance(input_file, raw.types.InputFileBig)
+        session = await self._media_session(client)
+        try:
+            await self._send_part(client, session, self._part_query(input_file.id, index, input_file.parts, chunk, is_big))
+        finally:
+            await session.stop()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of upload metrics"""
+        return {
+            "uploads": self.uploads,
+            "deduplicated": self.deduplicated,
+            "failed": self.failed,
+            "bytes": self.bytes_uploaded,
+        }
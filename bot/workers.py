@@ -0,0 +1,232 @@
+"""
+CPU worker pool for Nexus v2.0
+Process pool that keeps CPU-bound plugin work off the event loop
+Created by: The Nexus Team
+GitHub: https://github.com/The-Nexus-Bot/Nexus-Userbot
+License: MIT
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Optional, Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class SharedBytes:
+    """Handle to a bytes payload parked in shared memory
+
+    Only the segment name and size are pickled, so large payloads cross the
+    process boundary without being copied through the executor's pipe.
+    """
+
+    __slots__ = ("name", "size")
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+
+    @classmethod
+    def create(cls, data: bytes) -> "SharedBytes":
+        segment = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        segment.buf[:len(data)] = data
+        handle = cls(segment.name, len(data))
+        segment.close()
+        return handle
+
+    def read(self, unlink: bool = False) -> bytes:
+        segment = shared_memory.SharedMemory(name=self.name)
+        try:
+            return bytes(segment.buf[:self.size])
+        finally:
+            segment.close()
+            if unlink:
+                segment.unlink()
+
+    def unlink(self):
+        try:
+            segment = shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return
+        segment.close()
+        segment.unlink()
+
+    def __getstate__(self):
+        return (self.name, self.size)
+
+    def __setstate__(self, state):
+        self.name, self.size = state
+
+
+def _warm_up() -> int:
+    """Runs once in every worker at startup so the first real task is fast"""
+    return os.getpid()
+
+
+def _run_task(fn: Callable, args: tuple, kwargs: dict, threshold: int):
+    """Worker-side trampoline: unpack shared-memory args, pack a large result"""
+    args = tuple(a.read() if isinstance(a, SharedBytes) else a for a in args)
+    kwargs = {k: (v.read() if isinstance(v, SharedBytes) else v) for k, v in kwargs.items()}
+    result = fn(*args, **kwargs)
+    if isinstance(result, (bytes, bytearray)) and len(result) >= threshold:
+        return SharedBytes.create(bytes(result))
+    return result
+
+
+class CPUPool:
+    """Bounded process pool with per-task timeouts and shared-memory payloads
+
+    Functions and arguments must be picklable (define task functions at
+    module level in the plugin). bytes arguments and results larger than
+    `shm_threshold` travel through shared memory. A task that exceeds its
+    timeout cannot be interrupted inside a worker, so the whole pool is
+    recycled to reclaim the stuck process. Tasks that were running in the
+    recycled pool through no fault of their own are run once more on the
+    new pool.
+    """
+
+    def __init__(self, max_workers: int = 2, timeout: float = 30.0, shm_threshold: int = 256 * 1024):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.shm_threshold = shm_threshold
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = asyncio.Semaphore(self.max_workers)
+        # Serializes start/recycle so one failure restarts the pool only once
+        self._lock = asyncio.Lock()
+        # Executors terminated on purpose; their BrokenProcessPool is not the task's fault
+        self._killed: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+
+        # Metrics
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self.retried = 0
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # forkserver/spawn avoid forking a process that holds sockets and threads
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+
+    async def start(self):
+        """Create the pool and pre-start every worker"""
+        async with self._lock:
+            await self._start()
+
+    async def _start(self):
+        if self._executor is not None:
+            return
+        executor = self._executor = self._create_executor()
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(
+            loop.run_in_executor(executor, _warm_up) for _ in range(self.max_workers)
+        ))
+        logger.info(f"🧮 CPU pool ready with {len(set(pids))} warm workers")
+
+    async def stop(self):
+        """Shut the pool down"""
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+
+    async def _recycle(self, executor: ProcessPoolExecutor):
+        """Kill every worker of `executor` and start a fresh pool
+
+        A no-op if that executor was already replaced, so the tasks a
+        recycle breaks cannot trigger another one.
+        """
+        async with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self._killed.add(executor)
+            self.recycled += 1
+            for process in list((getattr(executor, "_processes", None) or {}).values()):
+                process.terminate()
+            await asyncio.to_thread(executor.shutdown, False, cancel_futures=True)
+            await self._start()
+
+    async def _recycle_quietly(self, executor: ProcessPoolExecutor):
+        """Recycle without letting a failed restart hide the caller's own error"""
+        try:
+            await self._recycle(executor)
+        except Exception as e:
+            logger.error(f"❌ CPU pool restart failed: {e}")
+
+    def _pack(self, value, handles: list):
+        if isinstance(value, (bytes, bytearray)) and len(value) >= self.shm_threshold:
+            handle = SharedBytes.create(bytes(value))
+            handles.append(handle)
+            return handle
+        return value
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """Run fn(*args, **kwargs) in a worker process and return its result"""
+        if self._executor is None:
+            await self.start()
+
+        handles: list = []
+        packed_args = tuple(self._pack(a, handles) for a in args)
+        packed_kwargs = {k: self._pack(v, handles) for k, v in kwargs.items()}
+        timeout = timeout if timeout is not None else self.timeout
+
+        async with self._slots:
+            try:
+                result = await self._submit(fn, packed_args, packed_kwargs, timeout)
+            finally:
+                for handle in handles:
+                    handle.unlink()
+
+        self.completed += 1
+        if isinstance(result, SharedBytes):
+            return result.read(unlink=True)
+        return result
+
+    async def _submit(self, fn: Callable, args: tuple, kwargs: dict, timeout: float):
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            if self._executor is None:
+                await self.start()
+            executor = self._executor
+            future = loop.run_in_executor(executor, _run_task, fn, args, kwargs, self.shm_threshold)
+            try:
+                return await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                logger.warning(f"⏱️ CPU task {getattr(fn, '__name__', fn)} exceeded {timeout}s - recycling pool")
+                await self._recycle_quietly(executor)
+                raise
+            except BrokenProcessPool as e:
+                if executor in self._killed:
+                    if attempt == 0:
+                        # Killed by another task's recycle, not by this task: run it again
+                        self.retried += 1
+                        continue
+                    self.failed += 1
+                    raise BrokenProcessPool("CPU pool was recycled twice while the task was running") from e
+                # A worker crashed while running this task
+                self.failed += 1
+                await self._recycle_quietly(executor)
+                raise
+            except Exception:
+                self.failed += 1
+                raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of pool metrics"""
+        return {
+            "workers": self.max_workers,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "recycled": self.recycled,
+            "retried": self.retried,
+        }
@@ -23,6 +23,15 @@ class Config:
         self.API_HASH = os.getenv("API_HASH", "")
         self.SESSION_STRING = os.getenv("SESSION_STRING", "")
         
+        # Multi-account mode: every session to run (comma or newline separated).
+        # SESSION_STRING, when set, is always the primary (first) account.
+        self.SESSION_STRINGS = self._parse_sessions(os.getenv("SESSION_STRINGS", ""))
+        if self.SESSION_STRING and self.SESSION_STRING not in self.SESSION_STRINGS:
+            self.SESSION_STRINGS.insert(0, self.SESSION_STRING)
+        elif self.SESSION_STRINGS and not self.SESSION_STRING:
+            self.SESSION_STRING = self.SESSION_STRINGS[0]
+        self.STARTUP_STAGGER = float(os.getenv("STARTUP_STAGGER", "2"))
+        
         # Auto-generated configuration (will be set during setup)
         self.BOT_TOKEN = os.getenv("BOT_TOKEN", "")
         self.BOT_USERNAME = os.getenv("BOT_USERNAME", "")
@@ -32,6 +41,9 @@ class Config:
         self.SUDO_USERS = self._parse_list(os.getenv("SUDO_USERS", ""))
         self.PM_PERMIT = os.getenv("PM_PERMIT", "True").lower() == "true"
         self.PM_LOG = os.getenv("PM_LOG", "True").lower() == "true"
+        self.PM_WARN_LIMIT = int(os.getenv("PM_WARN_LIMIT", "3"))
+        self.PM_WARN_DECAY = float(os.getenv("PM_WARN_DECAY", "600"))
+        self.PM_REPLY_RATE = float(os.getenv("PM_REPLY_RATE", "0.5"))
         self.COMMAND_PREFIX = os.getenv("COMMAND_PREFIX", ".")
         self.ASSISTANT_PREFIX = os.getenv("ASSISTANT_PREFIX", "/")
         
@@ -44,18 +56,80 @@ class Config:
         # Database and storage
         self.DATABASE_URL = os.getenv("DATABASE_URL", "")
         self.REDIS_URL = os.getenv("REDIS_URL", "")
+        self.DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+        self.DB_BATCH_SIZE = int(os.getenv("DB_BATCH_SIZE", "100"))
+        self.DB_FLUSH_INTERVAL = float(os.getenv("DB_FLUSH_INTERVAL", "0.2"))
+        
+        # Entity cache (users/chats/peers)
+        self.ENTITY_CACHE_SIZE = int(os.getenv("ENTITY_CACHE_SIZE", "5000"))
+        self.ENTITY_CACHE_TTL = float(os.getenv("ENTITY_CACHE_TTL", "300"))
+        self.ENTITY_CACHE_PERSIST = os.getenv("ENTITY_CACHE_PERSIST", "True").lower() == "true"
+        self.ENTITY_PERSIST_INTERVAL = float(os.getenv("ENTITY_PERSIST_INTERVAL", "300"))
+        
+        # Local full-text message index (SQLite FTS5 in sessions/)
+        self.MESSAGE_INDEX = os.getenv("MESSAGE_INDEX", "False").lower() == "true"
+        self.MESSAGE_INDEX_BATCH = int(os.getenv("MESSAGE_INDEX_BATCH", "200"))
         
         # Plugin configuration
         self.LOAD_PLUGINS = os.getenv("LOAD_PLUGINS", "True").lower() == "true"
         self.PLUGIN_CHANNEL = os.getenv("PLUGIN_CHANNEL", "")
+        self.DEV_MODE = os.getenv("DEV_MODE", "False").lower() == "true"
+        self.PLUGIN_WATCH_INTERVAL = float(os.getenv("PLUGIN_WATCH_INTERVAL", "1"))
+        self.RELOAD_DRAIN_TIMEOUT = float(os.getenv("RELOAD_DRAIN_TIMEOUT", "30"))
+        
+        # Per-plugin budgets (per minute, 0 = unlimited)
+        self.PLUGIN_CPU_BUDGET = float(os.getenv("PLUGIN_CPU_BUDGET", "30"))
+        self.PLUGIN_API_BUDGET = float(os.getenv("PLUGIN_API_BUDGET", "600"))
+        self.PLUGIN_UPLOAD_BUDGET_MB = float(os.getenv("PLUGIN_UPLOAD_BUDGET_MB", "0"))
+        self.PLUGIN_TASK_LIMIT = int(os.getenv("PLUGIN_TASK_LIMIT", "1000"))
+        self.PLUGIN_DISABLE_STRIKES = int(os.getenv("PLUGIN_DISABLE_STRIKES", "5"))
         
         # Media configuration
         self.MAX_MESSAGE_LENGTH = int(os.getenv("MAX_MESSAGE_LENGTH", "4096"))
         self.DOWNLOAD_DIRECTORY = os.getenv("DOWNLOAD_DIRECTORY", "./downloads")
+        self.DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", "4"))
+        self.DOWNLOAD_PARTS = int(os.getenv("DOWNLOAD_PARTS", "4"))
+        self.DOWNLOAD_PART_SIZE = int(os.getenv("DOWNLOAD_PART_SIZE", "8"))
+        self.DOWNLOAD_CACHE_MB = int(os.getenv("DOWNLOAD_CACHE_MB", "1024"))
+        self.UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+        self.UPLOAD_PARTS = int(os.getenv("UPLOAD_PARTS", "4"))
+        self.UPLOAD_RATE_KB = float(os.getenv("UPLOAD_RATE_KB", "0"))
+        self.UPLOAD_PROGRESS_INTERVAL = float(os.getenv("UPLOAD_PROGRESS_INTERVAL", "2"))
+        self.HISTORY_PAGE_RATE = float(os.getenv("HISTORY_PAGE_RATE", "3"))
+        self.HISTORY_PREFETCH = int(os.getenv("HISTORY_PREFETCH", "2"))
+        
+        # Update processing
+        self.UPDATE_WORKERS = int(os.getenv("UPDATE_WORKERS", "8"))
+        self.UPDATE_QUEUE_SIZE = int(os.getenv("UPDATE_QUEUE_SIZE", "1000"))
+        self.SLOW_COMMAND_THRESHOLD = float(os.getenv("SLOW_COMMAND_THRESHOLD", "2"))
+        
+        # CPU worker processes for heavy plugin work (0 runs it in threads instead)
+        self.CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(min(2, os.cpu_count() or 1))))
+        self.CPU_TASK_TIMEOUT = float(os.getenv("CPU_TASK_TIMEOUT", "30"))
+        self.CPU_SHM_THRESHOLD = int(os.getenv("CPU_SHM_THRESHOLD", str(256 * 1024)))
+        
+        # Health check thresholds (seconds / queued updates)
+        self.LIVE_MAX_LOOP_LAG = float(os.getenv("LIVE_MAX_LOOP_LAG", "10"))
+        self.READY_MAX_LOOP_LAG = float(os.getenv("READY_MAX_LOOP_LAG", "1"))
+        self.READY_MAX_QUEUE_DEPTH = int(os.getenv("READY_MAX_QUEUE_DEPTH", str(int(self.UPDATE_QUEUE_SIZE * 0.8))))
+        
+        # Outbound rate limits (messages per second)
+        self.OUTBOUND_RATE = float(os.getenv("OUTBOUND_RATE", "25"))
+        self.OUTBOUND_BURST = float(os.getenv("OUTBOUND_BURST", "30"))
+        self.OUTBOUND_CHAT_RATE = float(os.getenv("OUTBOUND_CHAT_RATE", "1"))
+        self.OUTBOUND_CHAT_BURST = float(os.getenv("OUTBOUND_CHAT_BURST", "3"))
+        self.FLOOD_WAIT_RETRIES = int(os.getenv("FLOOD_WAIT_RETRIES", "3"))
         
         # Security settings
         self.ANTI_SPAM = os.getenv("ANTI_SPAM", "True").lower() == "true"
+        self.SPAM_USER_RATE = float(os.getenv("SPAM_USER_RATE", "0.5"))
+        self.SPAM_USER_BURST = float(os.getenv("SPAM_USER_BURST", "5"))
+        self.SPAM_CHAT_RATE = float(os.getenv("SPAM_CHAT_RATE", "2"))
+        self.SPAM_CHAT_BURST = float(os.getenv("SPAM_CHAT_BURST", "20"))
+        self.SPAM_IGNORE_SECONDS = float(os.getenv("SPAM_IGNORE_SECONDS", "300"))
         self.LOG_ERRORS = os.getenv("LOG_ERRORS", "True").lower() == "true"
+        self.LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "5"))
+        self.LOG_BUFFER_SIZE = int(os.getenv("LOG_BUFFER_SIZE", "200"))
         
         # Deployment settings
         self.HEROKU_APP_NAME = os.getenv("HEROKU_APP_NAME", "")
@@ -84,6 +158,15 @@ class Config:
             logger.warning(f"Invalid list format: {value}")
             return []
     
+    def _parse_sessions(self, value: str) -> list:
+        """Parse comma/newline separated session strings"""
+        sessions = []
+        for item in value.replace("\n", ",").split(","):
+            item = item.strip()
+            if item and item not in sessions:
+                sessions.append(item)
+        return sessions
+    
     def _validate_session_string(self, session_string: str) -> bool:
         """Validate Pyrogram session string format"""
         if not session_string:
@@ -121,6 +204,10 @@ class Config:
         elif not self._validate_session_string(self.SESSION_STRING):
             errors.append("SESSION_STRING appears to be invalid - please regenerate using generate_session.py")
         
+        for index, session_string in enumerate(self.SESSION_STRINGS[1:], start=2):
+            if not self._validate_session_string(session_string):
+                errors.append(f"SESSION_STRINGS account #{index} appears to be invalid - please regenerate it")
+        
         if errors:
             error_msg = "❌ Configuration errors:\n" + "\n".join(f"- {error}" for error in errors)
             error_msg += "\n\n📖 For help generating session string, run: python generate_session.py"
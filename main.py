@@ -10,6 +10,7 @@ import asyncio
 import logging
 import os
 import sys
+import time
 from pathlib import Path
 
 # Add project root to Python path
@@ -17,8 +18,21 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from aiohttp import web
+from bot.budgets import PluginBudgets
+from bot.cache import EntityCache, create_peer_store
 from bot.client import NexusClient
+from bot.database import create_database
+from bot.downloads import DownloadManager
+from bot.filecache import FileCache
+from bot.logsink import LogSink
 from bot.logger import setup_logging
+from bot.metrics import MetricsWriter, collect_client, collect_process
+from bot.monitor import LoopLagMonitor
+from bot.plugins import PluginWatcher, import_fresh
+from bot.search import MessageIndex
+from bot.setup import AutoSetup
+from bot.uploads import UploadManager
+from bot.workers import CPUPool
 from config import Config
 
 # Configure logging
@@ -29,11 +43,110 @@ async def health_check(request):
     """Health check endpoint for deployment platforms."""
     return web.Response(text="Nexus v2.0 is running!", status=200)
 
-async def create_health_server():
+async def liveness_check(request):
+    """Liveness probe - fails only when the event loop is badly starved."""
+    bot = request.app["bot"]
+    lag = bot.lag_monitor.get_stats()
+    healthy = lag["max_lag"] < bot.config.LIVE_MAX_LOOP_LAG
+    return web.json_response(
+        {"status": "ok" if healthy else "stalled", "loop": lag},
+        status=200 if healthy else 503
+    )
+
+def _client_readiness(bot, label, client):
+    """Health snapshot and problems for one account."""
+    health = client.get_health()
+    health["started"] = bot.ready.get(label, False)
+
+    problems = []
+    if not (health["started"] and health["connected"]):
+        problems.append(f"{label} not connected")
+    if health["queue_depth"] > bot.config.READY_MAX_QUEUE_DEPTH:
+        problems.append(f"{label} update queue at {health['queue_depth']}")
+    return health, problems
+
+def _loop_problems(bot, lag):
+    if lag["lag"] > bot.config.READY_MAX_LOOP_LAG:
+        return [f"event loop lag {lag['lag'] * 1000:.0f}ms"]
+    return []
+
+async def readiness_check(request):
+    """Readiness probe - client state, queue depth and loop lag."""
+    bot = request.app["bot"]
+    lag = bot.lag_monitor.get_stats()
+
+    clients = {}
+    problems = _loop_problems(bot, lag)
+    for label, client in bot.clients.items():
+        health, client_problems = _client_readiness(bot, label, client)
+        clients[label] = health
+
+        # Only the primary userbot gates readiness; the assistant and extra
+        # accounts are reported here and have their own /readyz/<account>
+        if label == "userbot":
+            problems.extend(client_problems)
+        else:
+            problems.extend(p for p in client_problems if "queue" in p)
+
+    return web.json_response(
+        {
+            "status": "ready" if not problems else "not ready",
+            "problems": problems,
+            "loop": lag,
+            "clients": clients,
+        },
+        status=200 if not problems else 503
+    )
+
+async def account_readiness_check(request):
+    """Readiness of a single account, e.g. /readyz/userbot_2."""
+    bot = request.app["bot"]
+    label = request.match_info["account"]
+    client = bot.clients.get(label)
+    if client is None:
+        return web.json_response({"status": "unknown account"}, status=404)
+
+    lag = bot.lag_monitor.get_stats()
+    health, problems = _client_readiness(bot, label, client)
+    problems = _loop_problems(bot, lag) + problems
+    return web.json_response(
+        {
+            "status": "ready" if not problems else "not ready",
+            "problems": problems,
+            "loop": lag,
+            "client": health,
+        },
+        status=200 if not problems else 503
+    )
+
+async def metrics_endpoint(request):
+    """Prometheus text exposition of bot and process metrics."""
+    bot = request.app["bot"]
+    writer = MetricsWriter()
+    for label, client in bot.clients.items():
+        collect_client(writer, label, client)
+    # Shared components are emitted once, not once per client label
+    collect_process(
+        writer, bot.lag_monitor, bot.cpu_pool, bot.budgets,
+        entities=bot.entities,
+        db=bot.db,
+        downloads=bot.downloads,
+        uploads=bot.uploads,
+        message_index=bot.message_index,
+        log_sink=bot.log_sink
+    )
+    return web.Response(text=writer.render(), content_type="text/plain", charset="utf-8")
+
+async def create_health_server(bot):
     """Create a simple health check server for deployment platforms."""
     app = web.Application()
+    app["bot"] = bot
     app.router.add_get('/', health_check)
     app.router.add_get('/health', health_check)
+    app.router.add_get('/livez', liveness_check)
+    app.router.add_get('/readyz', readiness_check)
+    app.router.add_get('/readyz/{account}', account_readiness_check)
+    app.router.add_get('/metrics', metrics_endpoint)
 
     # Get port from environment or use default
     port = int(os.environ.get('PORT', 5000))
@@ -54,6 +167,20 @@ class NexusBot:
         self.userbot = None
         self.assistant = None
         self.setup_manager = None
+        self.clients = {}
+        self.ready = {}
+        self.lag_monitor = LoopLagMonitor()
+
+        # Shared by every account running in this process
+        self.db = None
+        self.entities = None
+        self.log_sink = None
+        self.cpu_pool = None
+        self.downloads = None
+        self.uploads = None
+        self.message_index = None
+        self.budgets = None
+        self.plugin_watcher = None
 
     async def initialize(self):
         """Initialize the bot with automatic setup"""
@@ -74,28 +201,72 @@ class NexusBot:
                 logger.error("❌ Auto-setup failed. Please check your configuration.")
                 return False
 
+            # One storage backend, entity cache, log sink and transfer managers for all accounts
+            self.db = create_database(self.config)
+            self.entities = EntityCache(
+                maxsize=self.config.ENTITY_CACHE_SIZE,
+                ttl=self.config.ENTITY_CACHE_TTL,
+                store=create_peer_store(self.config)
+            )
+            self.log_sink = LogSink(
+                self._send_log,
+                max_length=self.config.MAX_MESSAGE_LENGTH,
+                interval=self.config.LOG_FLUSH_INTERVAL,
+                max_entries=self.config.LOG_BUFFER_SIZE
+            )
+            self.downloads = DownloadManager(
+                FileCache(self.config.DOWNLOADS_DIR, max_bytes=self.config.DOWNLOAD_CACHE_MB * 1024 * 1024),
+                concurrency=self.config.DOWNLOAD_CONCURRENCY,
+                parts=self.config.DOWNLOAD_PARTS,
+                part_size=self.config.DOWNLOAD_PART_SIZE
+            )
+            self.uploads = UploadManager(
+                concurrency=self.config.UPLOAD_CONCURRENCY,
+                parts=self.config.UPLOAD_PARTS,
+                rate=self.config.UPLOAD_RATE_KB * 1024,
+                progress_interval=self.config.UPLOAD_PROGRESS_INTERVAL
+            )
+            if self.config.MESSAGE_INDEX:
+                self.message_index = MessageIndex(
+                    self.config.BASE_DIR / "sessions" / "messages.db",
+                    batch_size=self.config.MESSAGE_INDEX_BATCH
+                )
+            self.budgets = PluginBudgets(
+                cpu_budget=self.config.PLUGIN_CPU_BUDGET,
+                api_budget=self.config.PLUGIN_API_BUDGET,
+                bytes_budget=self.config.PLUGIN_UPLOAD_BUDGET_MB * 1024 * 1024,
+                task_limit=self.config.PLUGIN_TASK_LIMIT,
+                disable_after=self.config.PLUGIN_DISABLE_STRIKES
+            )
+            if self.config.CPU_WORKERS > 0:
+                self.cpu_pool = CPUPool(
+                    max_workers=self.config.CPU_WORKERS,
+                    timeout=self.config.CPU_TASK_TIMEOUT,
+                    shm_threshold=self.config.CPU_SHM_THRESHOLD
+                )
+
             # Initialize userbot client with session string only
             logger.info("🚀 Initializing userbot client with session string...")
-            self.userbot = NexusClient(
-                name="nexus_userbot",
-                api_id=self.config.API_ID,
-                api_hash=self.config.API_HASH,
-                session_string=self.config.SESSION_STRING,
-                is_assistant=False,
-                config=self.config
-            )
+            self.userbot = self._create_client("nexus_userbot", session_string=self.config.SESSION_STRING)
+            self.clients["userbot"] = self.userbot
+
+            # Extra accounts share the plugin modules and the components above
+            extra_sessions = self.config.SESSION_STRINGS[1:]
+            if extra_sessions:
+                logger.info(f"👥 Initializing {len(extra_sessions)} additional accounts...")
+            for index, session_string in enumerate(extra_sessions, start=2):
+                label = f"userbot_{index}"
+                self.clients[label] = self._create_client(f"nexus_{label}", session_string=session_string)
 
             # Initialize assistant bot if token is available
             if self.config.BOT_TOKEN:
                 logger.info("🤖 Initializing assistant bot...")
-                self.assistant = NexusClient(
-                    name="nexus_assistant",
-                    api_id=self.config.API_ID,
-                    api_hash=self.config.API_HASH,
+                self.assistant = self._create_client(
+                    "nexus_assistant",
                     bot_token=self.config.BOT_TOKEN,
-                    is_assistant=True,
-                    config=self.config
+                    is_assistant=True
                 )
+                self.clients["assistant"] = self.assistant
 
             return True
 
@@ -103,26 +274,74 @@ class NexusBot:
             logger.error(f"❌ Initialization failed: {e}")
             return False
 
+    def _create_client(self, name: str, is_assistant: bool = False, **kwargs) -> NexusClient:
+        """Build a client wired to the shared components"""
+        return NexusClient(
+            name=name,
+            api_id=self.config.API_ID,
+            api_hash=self.config.API_HASH,
+            is_assistant=is_assistant,
+            config=self.config,
+            entities=self.entities,
+            db=self.db,
+            log_sink=self.log_sink,
+            cpu_pool=self.cpu_pool,
+            downloads=self.downloads,
+            uploads=self.uploads,
+            message_index=self.message_index,
+            budgets=self.budgets,
+            **kwargs
+        )
+
+    async def _send_log(self, chat_id, text: str):
+        """Log group messages always go out through the primary account"""
+        return await self.userbot.send_message(chat_id, text)
+
     async def start(self):
         """Start both userbot and assistant bot"""
+        runner = None
         try:
             # Start health check server for deployment platforms
-            runner, port = await create_health_server()
+            self.lag_monitor.start()
+            runner, port = await create_health_server(self)
             logger.info(f"🌐 Health check server started on port {port}")
 
-            # Start userbot
-            logger.info("🔄 Starting userbot...")
-            await self.userbot.start()
-            logger.info("✅ Userbot started successfully")
-
-            # Start assistant bot if available
-            if self.assistant:
-                logger.info("🔄 Starting assistant bot...")
-                await self.assistant.start()
-                logger.info("✅ Assistant bot started successfully")
+            await self.db.start()
+            self.log_sink.start()
+            if self.message_index:
+                await self.message_index.start()
+            if self.cpu_pool:
+                # Fork warm workers before plugins load and memory grows
+                await self.cpu_pool.start()
+            self.budgets.install()
+
+            # Start accounts concurrently; userbots are staggered so dozens of
+            # sessions don't all connect and load plugins in the same instant
+            delays = {}
+            for label, client in self.clients.items():
+                if client.is_userbot:
+                    delays[label] = len(delays) * self.config.STARTUP_STAGGER
+            await asyncio.gather(*(
+                self._start_client(label, client, delays.get(label, 0.0))
+                for label, client in self.clients.items()
+            ))
+
+            if not self.ready.get("userbot"):
+                raise RuntimeError("Userbot failed to start")
+
+            if self.config.DEV_MODE:
+                self.plugin_watcher = PluginWatcher(
+                    self.config.PLUGINS_DIR,
+                    self._on_plugin_change,
+                    interval=self.config.PLUGIN_WATCH_INTERVAL
+                )
+                await self.plugin_watcher.start()
 
             # Keep the bot running
-            logger.info("🎉 Nexus v2.0 is now running!")
+            status = ", ".join(
+                f"{label}: {'ready' if ok else 'failed'}" for label, ok in self.ready.items()
+            )
+            logger.info(f"🎉 Nexus v2.0 is now running! ({status})")
             await asyncio.Event().wait()
 
         except KeyboardInterrupt:
@@ -132,25 +351,79 @@ class NexusBot:
         finally:
             await self.stop(runner)
 
+    async def _start_client(self, label: str, client: NexusClient, delay: float = 0.0) -> bool:
+        """Start one client and record its readiness"""
+        self.ready[label] = False
+        if delay:
+            await asyncio.sleep(delay)
+        started = time.perf_counter()
+        try:
+            logger.info(f"🔄 Starting {label}...")
+            await client.start()
+        except Exception as e:
+            logger.error(f"❌ Failed to start {label}: {e}")
+            return False
+
+        self.ready[label] = True
+        logger.info(f"✅ {label.capitalize()} ready in {time.perf_counter() - started:.1f}s")
+        return True
+
+    async def _on_plugin_change(self, plugin_name: str, removed: bool):
+        """Apply a plugin file change to every account (DEV_MODE watcher)"""
+        clients = [client for label, client in self.clients.items() if self.ready.get(label)]
+        if removed:
+            await asyncio.gather(*(client.unload_plugin(plugin_name) for client in clients))
+            return
+
+        # Import once; every account sets up the same new module
+        try:
+            module = import_fresh(plugin_name)
+        except Exception as e:
+            logger.error(f"❌ {plugin_name} failed to import, keeping the running version: {e}")
+            return
+        await asyncio.gather(*(client.reload_plugin(plugin_name, module) for client in clients))
+
     async def stop(self, runner):
         """Stop all clients gracefully"""
         try:
             logger.info("🔄 Stopping Nexus...")
 
-            if self.userbot and self.userbot.is_connected:
-                await self.userbot.stop()
-                logger.info("✅ Userbot stopped")
+            if self.plugin_watcher:
+                await self.plugin_watcher.stop()
+
+            # Flush queued log events while the primary account is still online
+            if self.log_sink:
+                await self.log_sink.stop()
 
-            if self.assistant and self.assistant.is_connected:
-                await self.assistant.stop()
-                logger.info("✅ Assistant bot stopped")
+            connected = {label: client for label, client in self.clients.items() if client.is_connected}
+            results = await asyncio.gather(
+                *(client.stop() for client in connected.values()),
+                return_exceptions=True
+            )
+            for label, result in zip(connected, results):
+                if isinstance(result, Exception):
+                    logger.error(f"❌ Failed to stop {label}: {result}")
+                else:
+                    logger.info(f"✅ {label.capitalize()} stopped")
+
+            if self.message_index:
+                await self.message_index.stop()
+            if self.db:
+                await self.db.close()
+            if self.cpu_pool:
+                await self.cpu_pool.stop()
+            if self.budgets:
+                self.budgets.uninstall()
+            if self.downloads:
+                await asyncio.to_thread(self.downloads.cache.save)
 
             logger.info("👋 Nexus v2.0 stopped gracefully")
 
         except Exception as e:
             logger.error(f"❌ Error during shutdown: {e}")
         finally:
-            if 'runner' in locals():
+            await self.lag_monitor.stop()
+            if runner is not None:
                 await runner.cleanup()
 
 async def main():
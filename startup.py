@@ -37,6 +37,9 @@ def check_environment():
     missing_vars = []
     
     for var in required_vars:
+        # Multi-account deployments may provide SESSION_STRINGS instead
+        if var == 'SESSION_STRING' and os.getenv('SESSION_STRINGS'):
+            continue
         if not os.getenv(var):
             missing_vars.append(var)
     